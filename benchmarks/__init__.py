@@ -0,0 +1 @@
+"""Offline benchmarks, run with python -m benchmarks.run."""
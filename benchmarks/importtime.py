@@ -0,0 +1,135 @@
+"""Import time of the integration, as Home Assistant bootstrap pays it.
+
+Run from the repository root:
+
+    python -m benchmarks.importtime --output imports.json
+    python -m benchmarks.importtime --compare imports.json
+
+Each sample imports the integration in a fresh interpreter under
+``python -X importtime``. The Home Assistant modules that are loaded before
+any custom integration (core, config entries, the sensor component, aiohttp,
+voluptuous...) are imported first and left out of the figures, unless
+--cold is given.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from .run import compare
+
+PACKAGE = "custom_components.precoscombustiveis"
+
+# Imported by Home Assistant before it sets up a custom integration
+PRELOADED = (
+    "aiohttp",
+    "voluptuous",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.helpers.storage",
+    "homeassistant.components.sensor",
+)
+
+# What bootstrap imports with no entry, for a loaded entry, and what a
+# config flow adds
+SCENARIOS = {
+    "no_entries": (PACKAGE,),
+    "setup": (PACKAGE, f"{PACKAGE}.sensor"),
+    "config_flow": (PACKAGE, f"{PACKAGE}.config_flow"),
+}
+
+MARKER = "-- integration --"
+
+
+def _sample(modules: tuple[str, ...], cold: bool) -> Dict[str, int]:
+    """Import modules in a fresh interpreter, return the self time of each new module."""
+    preload = "" if cold else "".join(f"import {module}\n" for module in PRELOADED)
+    code = (
+        f"{preload}"
+        f"import sys\nsys.stderr.write({MARKER!r} + '\\n')\n"
+        + "".join(f"import {module}\n" for module in modules)
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True)
+    lines = result.stderr.splitlines()
+    times: Dict[str, int] = {}
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def measure(modules: tuple[str, ...], repeat: int, cold: bool) -> Dict[str, Any]:
+    """Return the median import time of every module newly imported."""
+    samples = [_sample(modules, cold) for _ in range(repeat)]
+    names = set().union(*samples)
+    medians = {
+        name: statistics.median(sample.get(name, 0) for sample in samples)
+        for name in names
+    }
+    own = {name: value for name, value in medians.items() if name.startswith(PACKAGE)}
+    return {
+        "total_ms": round(sum(medians.values()) / 1000, 2),
+        "integration_ms": round(sum(own.values()) / 1000, 2),
+        "modules": len(medians),
+        "integration_modules": {
+            name[len(PACKAGE):] or "__init__": round(value / 1000, 2)
+            for name, value in sorted(own.items(), key=lambda item: -item[1])
+        },
+        "third_party": {
+            name: round(value / 1000, 2)
+            for name, value in sorted(medians.items(), key=lambda item: -item[1])
+            if not name.startswith(PACKAGE) and value >= 200
+        },
+    }
+
+
+def main() -> None:
+    """Parse the arguments, measure and report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--cold", action="store_true",
+                        help="do not preload the Home Assistant modules")
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--compare", help="previous results to compare with")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": {
+            name: measure(modules, args.repeat, args.cold)
+            for name, modules in SCENARIOS.items()
+        },
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            print(compare(json.load(file), report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
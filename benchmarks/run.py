@@ -0,0 +1,276 @@
+"""Offline benchmarks of the DGEG client, coordinator and sensors.
+
+Run from the repository root:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare results.json
+
+Every benchmark runs against benchmarks.server.FakeDGEG, never against DGEG.
+Results are written as JSON; with --compare the ratio to a previous run is
+printed for every metric.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+import aiohttp
+
+from custom_components.precoscombustiveis import dgeg
+from custom_components.precoscombustiveis.dgeg import DGEG, Station
+
+from .server import FakeDGEG
+
+DISTRITO_ID = 3
+
+
+def _patch_endpoints(base_url: str) -> None:
+    """Point the DGEG client at the fake server."""
+    dgeg.API_STATIONS_LIST = f"{base_url}/PesquisarPostos?idDistrito={{}}&qtdPorPagina=99999&pagina=1"
+    dgeg.API_URI_TEMPLATE = f"{base_url}/GetDadosPosto?id={{}}"
+
+
+def _timings(samples: list[float]) -> Dict[str, float]:
+    return {
+        "min_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+async def bench_list_stations(api: DGEG, server: FakeDGEG, repeat: int) -> Dict[str, Any]:
+    """Latency and peak memory of fetching and parsing a national-size listing."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        stations = await api.list_stations(DISTRITO_ID)
+        samples.append(time.perf_counter() - started)
+
+    # Traced apart, tracemalloc slows the parsing down several times
+    gc.collect()
+    tracemalloc.start()
+    stations = await api.list_stations(DISTRITO_ID)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "rows": server.listing_rows,
+        "parsed": len(stations),
+        "body_kb": round(server.listing_size / 1024, 1),
+        **_timings(samples),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_station_parsing(server: FakeDGEG, count: int, repeat: int) -> Dict[str, Any]:
+    """Throughput of building Station objects from GetDadosPosto payloads."""
+    payloads = [server.station_payload(station_id)["resultado"] for station_id in range(count)]
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for station_id, payload in enumerate(payloads):
+            Station(station_id, payload)
+        samples.append(time.perf_counter() - started)
+    best = min(samples)
+    return {
+        "stations": count,
+        **_timings(samples),
+        "stations_per_s": round(count / best),
+    }
+
+
+async def _async_hass(config_dir: str):
+    """Return a bare Home Assistant instance for the coordinator and sensors."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.core import HomeAssistant
+
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    return hass
+
+
+async def bench_coordinator_refresh(
+    api: DGEG, server: FakeDGEG, hass, count: int, repeat: int
+) -> tuple[Dict[str, Any], Any]:
+    """Time of a coordinator refresh fetching every tracked station."""
+    # pylint: disable=import-outside-toplevel
+    from custom_components.precoscombustiveis.coordinator import (
+        PrecosCombustiveisCoordinator,
+    )
+
+    coordinator = PrecosCombustiveisCoordinator(hass, api)
+    station_ids = list(range(1, count + 1))
+    started = time.perf_counter()
+    await coordinator.async_add_stations(station_ids)
+    setup = time.perf_counter() - started
+
+    samples = []
+    for _ in range(repeat):
+        requests = server.requests
+        started = time.perf_counter()
+        # Not scheduled: every station is fetched
+        await coordinator.async_refresh()
+        samples.append(time.perf_counter() - started)
+        assert coordinator.last_update_success, coordinator.last_exception
+        assert server.requests - requests == count
+    return {
+        "stations": count,
+        "latency_ms": round(server.latency * 1000, 1),
+        "add_stations_ms": round(setup * 1000, 3),
+        **_timings(samples),
+    }, coordinator
+
+
+def bench_sensor_fanout(hass, server: FakeDGEG, coordinator, repeat: int) -> Dict[str, Any]:
+    """Cost of pushing coordinator data to every fuel sensor."""
+    # pylint: disable=import-outside-toplevel
+    from custom_components.precoscombustiveis.sensor import PrecosCombustiveisSensor
+
+    sensors = []
+    for station_id, station in coordinator.data.items():
+        for fuel_type in station.fuel_types:
+            sensor = PrecosCombustiveisSensor(coordinator, station_id, fuel_type)
+            sensor.hass = hass
+            sensor.entity_id = f"sensor.bench_{station_id}_{len(sensors)}"
+            sensor.async_write_ha_state()
+            coordinator.async_add_listener(sensor._handle_coordinator_update)  # pylint: disable=protected-access
+            sensors.append(sensor)
+
+    def _run(make_data: Callable[[int], Dict[int, Station]]) -> list[float]:
+        samples = []
+        for index in range(repeat):
+            data = make_data(index)
+            started = time.perf_counter()
+            coordinator.async_set_updated_data(data)
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    skipped = coordinator.skipped_writes
+    unchanged = _run(lambda _: dict(coordinator.data))
+    skipped = coordinator.skipped_writes - skipped
+
+    def _changed(index: int) -> Dict[int, Station]:
+        server.price_offset = (index + 1) / 1000
+        return {
+            station_id: Station(station_id, server.station_payload(station_id)["resultado"])
+            for station_id in coordinator.data
+        }
+
+    changed = _run(_changed)
+    return {
+        "sensors": len(sensors),
+        "unchanged": _timings(unchanged),
+        "unchanged_skipped_writes": skipped,
+        "changed": _timings(changed),
+    }
+
+
+async def async_run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every benchmark and return the results."""
+    server = FakeDGEG(listing_rows=args.listing_rows, latency=args.latency / 1000)
+    _patch_endpoints(await server.start())
+    results: Dict[str, Any] = {}
+    try:
+        async with aiohttp.ClientSession() as session:
+            api = DGEG(
+                session,
+                rate_limit=args.rate_limit,
+                rate_burst=args.concurrency,
+                max_concurrency=args.concurrency,
+            )
+            results["list_stations"] = await bench_list_stations(api, server, args.repeat)
+            results["station_parsing"] = bench_station_parsing(
+                server, args.stations, args.repeat)
+
+            with tempfile.TemporaryDirectory() as config_dir:
+                hass = await _async_hass(config_dir)
+                results["coordinator_refresh"], coordinator = await bench_coordinator_refresh(
+                    api, server, hass, args.stations, args.repeat)
+                results["sensor_fanout"] = bench_sensor_fanout(
+                    hass, server, coordinator, args.repeat)
+                await hass.async_stop(force=True)
+            results["requests"] = api.metrics.as_dict()
+    finally:
+        await server.stop()
+    return results
+
+
+def _flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """Return a table of the metrics of two runs and their ratio."""
+    before = _flatten(previous["results"])
+    after = _flatten(current["results"])
+    lines = [f"{'metric':<45} {'before':>12} {'after':>12} {'ratio':>7}"]
+    for key, value in after.items():
+        if key not in before:
+            continue
+        ratio = f"{value / before[key]:.2f}" if before[key] else "-"
+        lines.append(f"{key:<45} {before[key]:>12} {value:>12} {ratio:>7}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Parse the arguments, run the benchmarks and report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stations", type=int, default=200,
+                        help="stations tracked by the coordinator")
+    parser.add_argument("--listing-rows", type=int, default=16000,
+                        help="rows of the PesquisarPostos listing")
+    parser.add_argument("--latency", type=float, default=5.0,
+                        help="server latency per request, in ms")
+    parser.add_argument("--concurrency", type=int, default=dgeg.DEFAULT_MAX_CONCURRENCY,
+                        help="requests in flight at once")
+    parser.add_argument("--rate-limit", type=float, default=1000.0,
+                        help="requests per second, high so it does not dominate")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--compare", help="previous results to compare with")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # The benchmark sensors are not added through an entity platform
+    logging.getLogger("homeassistant.helpers.entity").setLevel(logging.ERROR)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": asyncio.run(async_run(args)),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            print(compare(json.load(file), report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Local stand-in for the DGEG API, serving payloads built from the fixtures."""
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import os
+import random
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+BRANDS = ["GALP", "BP", "Repsol", "Prio", "Cepsa", "Intermarché", "Genérico"]
+MUNICIPIOS = [f"Municipio {index}" for index in range(20)]
+
+
+def load_fixture(name: str) -> dict:
+    """Return a fixture payload."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _price(value: float) -> str:
+    return f"{value:.3f}".replace(".", ",")
+
+
+class FakeDGEG:
+    """aiohttp server answering GetDadosPosto and PesquisarPostos.
+
+    Every station id gets a variant of the GetDadosPosto fixture with its own
+    name and prices; ``price_offset`` moves every price, to simulate DGEG
+    posting new prices. PesquisarPostos answers with a synthetic listing of
+    ``listing_rows`` rows (one per station and fuel, as DGEG does) for any
+    district, serialized once.
+    """
+
+    def __init__(self, listing_rows: int = 16000, latency: float = 0.0,
+                 seed: int = 0) -> None:
+        self.listing_rows = listing_rows
+        self.latency = latency
+        self.price_offset = 0.0
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._station = load_fixture("GetDadosPosto.json")
+        self._row = load_fixture("PesquisarPostos.json")["resultado"][0]
+        self._listing = self._build_listing()
+        self._runner: web.AppRunner | None = None
+
+    def station_payload(self, station_id: int) -> dict:
+        """Return the GetDadosPosto payload of a station."""
+        payload = copy.deepcopy(self._station)
+        station = payload["resultado"]
+        station["Nome"] = f"Posto {station_id}"
+        station["Marca"] = BRANDS[station_id % len(BRANDS)]
+        for index, fuel in enumerate(station["Combustiveis"]):
+            base = float(fuel["Preco"].split(" ")[0].replace(",", "."))
+            variation = ((station_id * 7 + index) % 50) / 1000
+            fuel["Preco"] = f"{_price(base + variation + self.price_offset)} €/litro"
+        return payload
+
+    def _build_listing(self) -> bytes:
+        fuels = [fuel["TipoCombustivel"] for fuel in self._station["resultado"]["Combustiveis"]]
+        rows = []
+        for index in range(self.listing_rows):
+            station_id = 10000 + index // len(fuels)
+            row = dict(self._row)
+            row.update({
+                "Id": station_id,
+                "Nome": f"Posto {station_id}",
+                "Marca": BRANDS[station_id % len(BRANDS)],
+                "Municipio": MUNICIPIOS[station_id % len(MUNICIPIOS)],
+                "Localidade": f"Localidade {station_id % 97}",
+                "Combustivel": fuels[index % len(fuels)],
+                "Preco": f"{_price(1.5 + self._random.random() / 2)} €",
+                "Latitude": round(37 + self._random.random() * 5, 6),
+                "Longitude": round(-9.5 + self._random.random() * 3, 6),
+                "Quantidade": self.listing_rows,
+            })
+            rows.append(row)
+        return json.dumps(
+            {"status": True, "mensagem": "sucesso", "resultado": rows},
+            ensure_ascii=False).encode("utf-8")
+
+    @property
+    def listing_size(self) -> int:
+        """Return the size in bytes of the listing body."""
+        return len(self._listing)
+
+    async def _get_dados_posto(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(self.station_payload(int(request.query["id"])))
+
+    async def _pesquisar_postos(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.Response(body=self._listing, content_type="application/json")
+
+    async def start(self) -> str:
+        """Start serving on a free local port, return the API base url."""
+        app = web.Application()
+        app.router.add_get("/api/PrecoComb/GetDadosPosto", self._get_dados_posto)
+        app.router.add_get("/api/PrecoComb/PesquisarPostos", self._pesquisar_postos)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        return f"http://127.0.0.1:{port}/api/PrecoComb"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -1,17 +1,37 @@
 """The PrecosCombustiveis integration."""
 from __future__ import annotations
-import os
-import shutil
+import asyncio
 import logging
+from datetime import timedelta
+from typing import TYPE_CHECKING
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.typing import ConfigType
 
-from .coordinator import PrecosCombustiveisCoordinator
-from .dgeg import DGEG
-from .const import DOMAIN, CONF_STATIONID
+from .const import (
+    DOMAIN,
+    DATA_COORDINATOR,
+    DATA_COORDINATOR_LOCK,
+    DATA_DISTRITO_LOOKUP,
+    DATA_NATIONAL_PRICES,
+    SIGNAL_ENTRY_UPDATED,
+    CONF_DISTRITO_ID,
+    CONF_ENTRY_TYPE,
+    CONF_STATIONID,
+    ENTRY_TYPE_CHEAPEST,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL_MINUTES,
+    DEFAULT_MAX_INTERVAL_MINUTES,
+)
+from .helpers import async_import_module, get_entry_station_ids, outside_config_entry
+from .services import async_setup_services
+
+if TYPE_CHECKING:
+    from .coordinator import PrecosCombustiveisCoordinator
 
 __version__ = "2.0.0"
 _LOGGER = logging.getLogger(__name__)
@@ -20,35 +40,170 @@ PLATFORMS: list[str] = ["sensor"]
 
 
 async def async_setup(hass: HomeAssistant, _: ConfigType) -> bool:
-    """Set up the integration domain."""
-    hass.data.setdefault(DOMAIN, {})
+    """Set up the integration domain.
+
+    Only the services are registered here: the coordinator, the DGEG client
+    and the modules behind them are loaded by the first entry set up.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data[DATA_COORDINATOR_LOCK] = asyncio.Lock()
+
+    async def _async_shutdown(_: Event) -> None:
+        # Shared by every entry, so bound to none and stopped with Home Assistant
+        for key in (DATA_COORDINATOR, DATA_NATIONAL_PRICES):
+            if (coordinator := domain_data.get(key)) is not None:
+                await coordinator.async_shutdown()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+
+    async_setup_services(hass)
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up the component from a config entry."""
-    await copy_images_to_www(hass)
+async def _async_get_coordinator(hass: HomeAssistant) -> PrecosCombustiveisCoordinator:
+    """Return the coordinator serving every config entry, created by the first one."""
+    domain_data = hass.data[DOMAIN]
+    async with domain_data[DATA_COORDINATOR_LOCK]:
+        coordinator = domain_data.get(DATA_COORDINATOR)
+        if coordinator is None:
+            coordinator_module = await async_import_module(hass, "coordinator")
+            client = await async_import_module(hass, "client")
+            with outside_config_entry():
+                coordinator = coordinator_module.PrecosCombustiveisCoordinator(
+                    hass, client.async_get_dgeg(hass))
+            await coordinator.async_restore()
+            domain_data[DATA_COORDINATOR] = coordinator
 
-    session = async_get_clientsession(hass, True)
-    api = DGEG(session)
+            # Once per start up, not per entry: reloads do no file system work
+            images = await async_import_module(hass, "images")
+            await images.async_sync_images(hass)
+    return coordinator
 
-    coordinator = PrecosCombustiveisCoordinator(
-        hass, api, int(entry.data[CONF_STATIONID])
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up the component from a config entry."""
+    coordinator = await _async_get_coordinator(hass)
+    station_ids = get_entry_station_ids(entry)
+    min_interval, max_interval = _get_entry_intervals(entry)
+    await coordinator.async_add_stations(
+        station_ids,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        distrito_id=entry.data.get(CONF_DISTRITO_ID),
     )
-    await coordinator.async_config_entry_first_refresh()
 
-    hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    _async_update_intervals(hass, station_ids)
+
+    if (entry.data.get(CONF_ENTRY_TYPE) != ENTRY_TYPE_CHEAPEST
+            and entry.data.get(CONF_DISTRITO_ID) is None):
+        # Entries created before the district was stored
+        _async_find_distrito(hass, entry)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_entry))
     return True
 
 
+async def async_update_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed fuel types and options in place, without a reload.
+
+    The coordinator and its data stay as they are: the polling bounds of the
+    entry stations are updated and the sensor platform adds or removes the
+    fuel sensors.
+    """
+    _async_update_intervals(hass, get_entry_station_ids(entry))
+    async_dispatcher_send(hass, SIGNAL_ENTRY_UPDATED.format(entry.entry_id))
+
+
+@callback
+def _async_find_distrito(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Queue a station entry for the lookup of its district.
+
+    A single task looks up every queued entry, so the entries set up at the
+    same start walk the district listings once between them.
+    """
+    domain_data = hass.data[DOMAIN]
+    pending = domain_data.get(DATA_DISTRITO_LOOKUP)
+    if pending is None:
+        pending = domain_data[DATA_DISTRITO_LOOKUP] = {}
+        hass.async_create_background_task(
+            _async_find_distritos(hass, pending), f"{DOMAIN} find distritos")
+    pending[entry.entry_id] = int(entry.data[CONF_STATIONID])
+
+
+async def _async_find_distritos(hass: HomeAssistant, pending: dict[str, int]) -> None:
+    """Look up the districts of the queued entries in the listings and store them."""
+    cache_module = await async_import_module(hass, "cache")
+    cache = cache_module.async_get_station_list_cache(hass)
+    try:
+        while pending:
+            station_ids = dict(pending)
+            pending.clear()
+            distritos = await cache.async_find_distritos(set(station_ids.values()))
+            for entry_id, station_id in station_ids.items():
+                distrito_id = distritos.get(station_id)
+                entry = hass.config_entries.async_get_entry(entry_id)
+                if distrito_id is None:
+                    _LOGGER.debug("Gas station %s is not listed in any distrito", station_id)
+                elif entry is not None:
+                    hass.config_entries.async_update_entry(
+                        entry, data={**entry.data, CONF_DISTRITO_ID: distrito_id})
+                    hass.data[DOMAIN][DATA_COORDINATOR].async_set_distrito(
+                        station_id, distrito_id)
+    finally:
+        hass.data[DOMAIN].pop(DATA_DISTRITO_LOOKUP, None)
+
+
+def _get_entry_intervals(entry: ConfigEntry) -> tuple[timedelta, timedelta]:
+    """Return the polling bounds set in the options of an entry."""
+    return (
+        timedelta(minutes=entry.options.get(
+            CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL_MINUTES)),
+        timedelta(minutes=entry.options.get(
+            CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL_MINUTES)),
+    )
+
+
+@callback
+def _async_update_intervals(hass: HomeAssistant, station_ids: list[int]) -> None:
+    """Set the polling bounds of stations from the loaded entries tracking them.
+
+    A station shared by several station entries keeps the tightest bounds
+    among them. Cheapest entries have no options and are left out: a station
+    only they track is polled within the default bounds.
+    """
+    coordinator: PrecosCombustiveisCoordinator = hass.data[DOMAIN][DATA_COORDINATOR]
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id in hass.data[DOMAIN]
+        and entry.data.get(CONF_ENTRY_TYPE) != ENTRY_TYPE_CHEAPEST
+    ]
+    for station_id in station_ids:
+        intervals = [
+            _get_entry_intervals(entry)
+            for entry in entries
+            if station_id in get_entry_station_ids(entry)
+        ] or [(timedelta(minutes=DEFAULT_MIN_INTERVAL_MINUTES),
+               timedelta(minutes=DEFAULT_MAX_INTERVAL_MINUTES))]
+        coordinator.async_set_intervals(
+            station_id,
+            min(interval[0] for interval in intervals),
+            min(interval[1] for interval in intervals),
+        )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        station_ids = get_entry_station_ids(entry)
+        for station_id in station_ids:
+            coordinator.async_remove_station(station_id)
+        # Bounds the entry tightened are loosened to the remaining entries'
+        _async_update_intervals(hass, station_ids)
     return unload_ok
 
 
@@ -56,28 +211,3 @@ async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
     await async_setup_entry(hass, entry)
-
-async def copy_images_to_www(hass: HomeAssistant):
-    """Copy images from the custom component's directory to the www folder."""
-    source_dir = os.path.join(os.path.dirname(__file__), "images")
-    target_dir = hass.config.path("www", "precoscombustiveis")
-
-    try:
-        os.makedirs(target_dir, exist_ok=True)
-
-        # Use async_add_executor_job to avoid blocking the event loop
-        filenames = await hass.async_add_executor_job(os.listdir, source_dir)
-
-        for filename in filenames:
-            source_file = os.path.join(source_dir, filename)
-            target_file = os.path.join(target_dir, filename)
-
-            # Copy only if file does not exist or is different (upgrade)
-            if not os.path.exists(target_file):
-                await hass.async_add_executor_job(shutil.copy, source_file, target_file)
-                _LOGGER.info("Copied: %s", filename)
-            else:
-                _LOGGER.debug("Ignored (because it already exists): %s", filename)
-
-    except Exception as e:
-        _LOGGER.error("Error copying images: %s", e)
@@ -0,0 +1,281 @@
+"""Persistent cache of the DGEG district station listings."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Dict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, DATA_STATION_LISTS, DISTRITOS
+from .client import async_get_dgeg
+from .dgeg import DGEG, DGEGError
+from .helpers import async_import_module
+
+if TYPE_CHECKING:
+    from .catalogue import StationCatalogue
+    from .geo import StationGrid
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.stations_{{}}"
+
+# The listings carry the prices, which DGEG updates during the day
+STATION_LIST_TTL = timedelta(hours=2)
+
+
+class StationListCache:
+    """District station listings, cached in .storage and revalidated lazily.
+
+    A fresh listing is served from memory (or disk after a restart). A stale
+    listing is still served immediately while a background task revalidates
+    it with the ETag/Last-Modified validators returned by DGEG. The network is
+    only awaited when a district was never fetched before.
+
+    There is at most one download of a district at a time: callers asking for
+    a district that is being fetched wait for that download.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: DGEG,
+                 ttl: timedelta = STATION_LIST_TTL) -> None:
+        """Initialize the cache."""
+        self._hass = hass
+        self._api = api
+        self._ttl = ttl.total_seconds()
+        self._stores: Dict[int, Store] = {}
+        self._listings: Dict[int, Dict[str, Any]] = {}
+        self._refreshing: Dict[int, asyncio.Task[Dict[str, Any] | None]] = {}
+        self._catalogues: Dict[int, tuple[list[Dict], StationCatalogue]] = {}
+        self._grid: tuple[list[list[Dict]], StationGrid] | None = None
+
+    def _store(self, distrito_id: int) -> Store:
+        """Return the store holding the listing of a district."""
+        store = self._stores.get(distrito_id)
+        if store is None:
+            store = self._stores[distrito_id] = Store(
+                self._hass, STORAGE_VERSION, STORAGE_KEY.format(distrito_id))
+        return store
+
+    async def _async_load(self, distrito_id: int) -> Dict[str, Any] | None:
+        """Return the listing of a district from memory or disk."""
+        listing = self._listings.get(distrito_id)
+        if listing is None:
+            listing = await self._store(distrito_id).async_load()
+            if listing is not None:
+                self._listings[distrito_id] = listing
+        return listing
+
+    async def async_get(self, distrito_id: int) -> list[Dict]:
+        """Return the stations of a district, fetching them only if needed."""
+        listing = await self._async_load(distrito_id)
+        if listing is None:
+            # Nothing to fall back to, let DGEG errors reach the caller
+            listing = await self._async_refresh(distrito_id, raise_on_error=True)
+            return listing["stations"] if listing else []
+
+        if time.time() - listing["fetched_at"] > self._ttl:
+            self._async_schedule_refresh(distrito_id)
+        return listing["stations"]
+
+    async def async_get_recent(
+        self, distrito_id: int, max_age: timedelta, fetch: bool = True
+    ) -> list[Dict] | None:
+        """Return the stations of a district listed at most max_age ago.
+
+        An older listing is revalidated right away, or None is returned
+        without fetch. Raises DGEGError if DGEG could not be reached.
+        """
+        listing = await self._async_load(distrito_id)
+        max_age_s = max_age.total_seconds()
+        if fetch and (listing is None or time.time() - listing["fetched_at"] > max_age_s):
+            listing = await self._async_refresh(distrito_id, raise_on_error=True)
+        if listing is None or time.time() - listing["fetched_at"] > max_age_s:
+            return None
+        return listing["stations"]
+
+    async def async_find_distritos(self, station_ids: set[int]) -> Dict[int, int]:
+        """Return the district whose listing holds each station.
+
+        The listings in memory or on disk are searched first, the others are
+        then fetched one at a time until every station is found. Stations no
+        listing holds are left out.
+        """
+        found: Dict[int, int] = {}
+        missing = []
+        for distrito_id in DISTRITOS:
+            listing = await self._async_load(distrito_id)
+            if listing is None:
+                missing.append(distrito_id)
+            else:
+                found.update(_find_stations(listing["stations"], station_ids, distrito_id))
+        for distrito_id in missing:
+            if len(found) == len(station_ids):
+                break
+            try:
+                stations = await self.async_get(distrito_id)
+            except DGEGError as ex:
+                _LOGGER.debug("Skipping distrito %s: %s", distrito_id, ex)
+                continue
+            found.update(_find_stations(stations, station_ids, distrito_id))
+        return found
+
+    async def async_get_catalogue(self, distrito_id: int) -> StationCatalogue:
+        """Return the indexed catalogue of a district.
+
+        The catalogue is built once per listing and reused by every flow
+        until the listing is refreshed.
+        """
+        stations = await self.async_get(distrito_id)
+        cached = self._catalogues.get(distrito_id)
+        if cached is not None and cached[0] is stations:
+            return cached[1]
+
+        catalogue_module = await async_import_module(self._hass, "catalogue")
+        catalogue = await self._hass.async_add_executor_job(
+            catalogue_module.StationCatalogue, stations)
+        self._catalogues[distrito_id] = (stations, catalogue)
+        return catalogue
+
+    async def async_get_grid(self) -> StationGrid:
+        """Return the spatial index of the stations of every district.
+
+        The index is rebuilt only when one of the district listings changed.
+        Raises DGEGError only if no district could be fetched.
+        """
+        results = await asyncio.gather(
+            *(self.async_get(distrito_id) for distrito_id in DISTRITOS),
+            return_exceptions=True)
+        # Districts that could not be fetched are left out until next time
+        listings: list[list[Dict]] = []
+        errors: list[DGEGError] = []
+        for result in results:
+            if isinstance(result, DGEGError):
+                errors.append(result)
+                listings.append([])
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                listings.append(result)
+        if len(errors) == len(results):
+            raise errors[0]
+        if errors:
+            _LOGGER.warning(
+                "Searching without %s districts that could not be fetched: %s",
+                len(errors), errors[0])
+
+        if self._grid is not None and all(
+            cached is stations
+            for cached, stations in zip(self._grid[0], listings)
+        ):
+            return self._grid[1]
+
+        geo = await async_import_module(self._hass, "geo")
+        grid = await self._hass.async_add_executor_job(
+            geo.StationGrid, dict(zip(DISTRITOS, listings)))
+        self._grid = (listings, grid)
+        return grid
+
+    @callback
+    def _async_schedule_refresh(self, distrito_id: int) -> None:
+        """Revalidate a stale listing in the background."""
+        if distrito_id not in self._refreshing:
+            self._async_start_refresh(distrito_id).add_done_callback(
+                self._log_refresh_error)
+
+    async def _async_refresh(
+        self, distrito_id: int, raise_on_error: bool = False
+    ) -> Dict[str, Any] | None:
+        """Fetch or revalidate a listing, joining the download in progress."""
+        task = self._refreshing.get(distrito_id) or self._async_start_refresh(distrito_id)
+        try:
+            # A cancelled caller must not cancel the download others wait for
+            return await asyncio.shield(task)
+        except DGEGError as ex:
+            if raise_on_error:
+                raise
+            _LOGGER.error("Error fetching stations list: %s", ex)
+            return self._listings.get(distrito_id)
+
+    @callback
+    def _async_start_refresh(self, distrito_id: int) -> asyncio.Task[Dict[str, Any] | None]:
+        """Start the download of a listing, marked in progress right away."""
+        task = self._refreshing[distrito_id] = self._hass.async_create_background_task(
+            self._async_fetch(distrito_id),
+            f"{DOMAIN} refresh stations list {distrito_id}",
+        )
+
+        @callback
+        def _done(_: asyncio.Task) -> None:
+            if self._refreshing.get(distrito_id) is task:
+                del self._refreshing[distrito_id]
+            if not task.cancelled():
+                # Retrieved even when every caller gave up waiting
+                task.exception()
+
+        task.add_done_callback(_done)
+        return task
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        """Log the error of a background revalidation."""
+        if not task.cancelled() and (ex := task.exception()) is not None:
+            _LOGGER.error("Error fetching stations list: %s", ex)
+
+    async def _async_fetch(self, distrito_id: int) -> Dict[str, Any] | None:
+        """Fetch or revalidate a listing and persist it."""
+        listing = self._listings.get(distrito_id)
+        stations, etag, last_modified = await self._api.fetch_stations_list(
+            distrito_id,
+            etag=listing["etag"] if listing else None,
+            last_modified=listing["last_modified"] if listing else None,
+        )
+
+        if stations is None and listing is not None:
+            # Keep the stored copy, a restart only costs one more revalidation
+            _LOGGER.debug("Stations list for distrito %s not modified", distrito_id)
+            listing["fetched_at"] = time.time()
+            return listing
+        if not stations:
+            # Never replace a known listing with an empty answer
+            return listing
+        if listing is not None and stations == listing["stations"]:
+            # Same stations and prices: keep the copy on disk and the object
+            # the catalogues and indexes were built from
+            listing.update(fetched_at=time.time(), etag=etag, last_modified=last_modified)
+            return listing
+
+        listing = {
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "stations": stations,
+        }
+        self._listings[distrito_id] = listing
+        await self._store(distrito_id).async_save(listing)
+        return listing
+
+
+def _find_stations(
+    stations: list[Dict], station_ids: set[int], distrito_id: int
+) -> Dict[int, int]:
+    """Map the stations a listing holds to its district."""
+    return {
+        int(station["Id"]): distrito_id
+        for station in stations
+        if int(station["Id"]) in station_ids
+    }
+
+
+@callback
+def async_get_station_list_cache(hass: HomeAssistant) -> StationListCache:
+    """Return the station list cache shared by every config flow."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    cache = domain_data.get(DATA_STATION_LISTS)
+    if cache is None:
+        cache = domain_data[DATA_STATION_LISTS] = StationListCache(
+            hass, async_get_dgeg(hass))
+    return cache
@@ -0,0 +1,58 @@
+"""Indexed catalogue of the stations of a district."""
+from __future__ import annotations
+
+from typing import Dict
+
+
+def _clean(value) -> str:
+    """Return a listing field as a stripped string."""
+    return str(value).strip() if value else ""
+
+
+class StationCatalogue:
+    """Stations of a district indexed by municipio and brand.
+
+    Built once per district listing and shared by every config flow, so each
+    step of the flow is a dictionary lookup instead of a scan of the listing.
+    """
+
+    def __init__(self, stations: list[Dict]):
+        self._by_id: Dict[str, Dict] = {}
+        self._index: Dict[str, Dict[str, list[Dict]]] = {}
+
+        for station in stations:
+            station_id = str(station["Id"])
+            if station_id in self._by_id:
+                continue
+            self._by_id[station_id] = station
+
+            municipio = _clean(station.get("Municipio"))
+            brand = _clean(station.get("Marca"))
+            if municipio and brand:
+                self._index.setdefault(municipio, {}).setdefault(brand, []).append(station)
+
+        self._municipios = sorted(self._index, key=str.casefold)
+        self._brands = {
+            municipio: sorted(brands, key=str.casefold)
+            for municipio, brands in self._index.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    @property
+    def municipios(self) -> list[str]:
+        """Return the sorted municipios of the district."""
+        return self._municipios
+
+    def brands(self, municipio: str) -> list[str]:
+        """Return the sorted brands with stations in a municipio."""
+        return self._brands.get(municipio, [])
+
+    def stations(self, municipio: str, brand: str) -> list[Dict]:
+        """Return the stations of a brand in a municipio."""
+        return self._index.get(municipio, {}).get(brand, [])
+
+    def get(self, station_id) -> Dict | None:
+        """Return a station by id."""
+        return self._by_id.get(str(station_id))
@@ -0,0 +1,91 @@
+"""Long-lived DGEG client shared by the whole integration."""
+from __future__ import annotations
+
+import time
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+
+from .const import DOMAIN, DATA_API
+from .dgeg import DEFAULT_MAX_CONCURRENCY, DGEG, FetchMetrics
+
+# Keep one connection per concurrent request open to the DGEG host
+CONNECTION_LIMIT_PER_HOST = DEFAULT_MAX_CONCURRENCY
+# Polls of a batch of stations reuse the connections of the previous request
+KEEPALIVE_TIMEOUT = 60  # seconds
+DNS_CACHE_TTL = 3600  # seconds
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": SERVER_SOFTWARE,
+}
+
+
+def _trace_config(metrics: FetchMetrics) -> aiohttp.TraceConfig:
+    """Return a trace config timing DNS lookups and new connections."""
+    trace_config = aiohttp.TraceConfig()
+
+    async def _on_dns_start(session, context, params) -> None:
+        context.dns_started = time.monotonic()
+
+    async def _on_dns_end(session, context, params) -> None:
+        metrics.dns.observe(time.monotonic() - context.dns_started)
+
+    async def _on_connect_start(session, context, params) -> None:
+        context.connect_started = time.monotonic()
+
+    async def _on_connect_end(session, context, params) -> None:
+        metrics.connect.observe(time.monotonic() - context.connect_started)
+
+    trace_config.on_dns_resolvehost_start.append(_on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_end)
+    trace_config.on_connection_create_start.append(_on_connect_start)
+    trace_config.on_connection_create_end.append(_on_connect_end)
+    return trace_config
+
+
+def _create_session(compress: bool, metrics: FetchMetrics) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        ssl=False,  # Disable SSL verification, for every request
+        enable_cleanup_closed=True,
+    )
+    headers = dict(DEFAULT_HEADERS)
+    if not compress:
+        headers["Accept-Encoding"] = "identity"
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=headers,
+        auto_decompress=compress,
+        # Only new connections and DNS cache misses are traced
+        trace_configs=[_trace_config(metrics)],
+    )
+
+
+@callback
+def async_get_dgeg(hass: HomeAssistant, compress: bool = True) -> DGEG:
+    """Return the DGEG client shared by the coordinator, flows and services.
+
+    The client owns its connection pool, so connections and DNS lookups are
+    reused across polls instead of being set up for every request. It is
+    created on first use (config flows may run before the integration is set
+    up) and closed when Home Assistant closes.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    api = domain_data.get(DATA_API)
+    if api is None:
+        metrics = FetchMetrics()
+        session = _create_session(compress, metrics)
+
+        async def _async_close(_: Event) -> None:
+            await session.close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+        api = domain_data[DATA_API] = DGEG(session, metrics=metrics)
+    return api
@@ -1,24 +1,49 @@
 """Config flow for PrecosCombustiveis integration."""
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import callback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers import config_validation as cv
+from homeassistant.const import CONF_LATITUDE, CONF_LOCATION, CONF_LONGITUDE, CONF_RADIUS
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, selector
 
 from .const import (
     DOMAIN,
+    DATA_COORDINATOR,
     CONF_STATIONID,
     CONF_STATION_NAME,
     CONF_STATION_BRAND,
     CONF_STATION_ADDRESS,
+    CONF_DISTRITO_ID,
     CONF_FUEL_TYPES,
-    DISTRITOS
+    CONF_FUEL_TYPE,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    CONF_NATIONAL_PRICES,
+    CONF_MUNICIPIO_RANK,
+    DEFAULT_MIN_INTERVAL_MINUTES,
+    DEFAULT_MAX_INTERVAL_MINUTES,
+    CONF_COUNT,
+    DEFAULT_COUNT,
+    DEFAULT_RADIUS,
+    CONF_STATIONS,
+    CONF_ENTRY_TYPE,
+    ENTRY_TYPE_CHEAPEST,
+    DISTRITOS,
+    FUEL_TYPES,
+    UNIT_OF_MEASUREMENT,
 )
-from .dgeg import DGEG
+from .cache import async_get_station_list_cache
+from .client import async_get_dgeg
+from .dgeg import DGEGError, Station
+from .helpers import async_import_module
+
+if TYPE_CHECKING:
+    from .catalogue import StationCatalogue
+    from .search import CheapStation
 
 logger = logging.getLogger(__name__)
 logger.level = logging.INFO
@@ -29,6 +54,23 @@ DATA_SCHEMA = vol.Schema(
     }
 )
 
+# Station details fetched less than this ago are reused by the flows
+STATION_DETAILS_TTL = 300  # seconds
+
+
+async def _async_get_station(hass: HomeAssistant, station_id: int) -> Station:
+    """Return the details of a station, without a request when recently known.
+
+    Stations tracked by the running coordinator are served from its data,
+    others from the shared client when fetched (by a flow, the nearby search
+    or the coordinator) within STATION_DETAILS_TTL.
+    """
+    coordinator = hass.data.get(DOMAIN, {}).get(DATA_COORDINATOR)
+    if coordinator is not None and coordinator.data and station_id in coordinator.data:
+        return coordinator.data[station_id]
+    return await async_get_dgeg(hass).get_station(station_id, max_age=STATION_DETAILS_TTL)
+
+
 class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """PrecosCombustiveis config flow."""
 
@@ -38,7 +80,7 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     @classmethod
     def async_supports_options_flow(cls, config_entry):
         """Return options flow support for this config entry."""
-        return True
+        return config_entry.data.get(CONF_ENTRY_TYPE) != ENTRY_TYPE_CHEAPEST
 
     @staticmethod
     @callback
@@ -60,19 +102,30 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     def __init__(self):
         """Initialize flow."""
-        self._stations: list = []
-        self._municipio_stations: list = []
+        self._catalogue: StationCatalogue | None = None
         self._filtered_stations: list = []
         self._selected_station: Dict[str, Any] = {}
         self._selected_municipio: str = ""
         self._selected_brand: str = ""
         self._selected_fuel_types: list = []
+        self._station_fuel_types: list = []
         self._distrito_id: int = 0
+        self._nearby_stations: Dict[str, CheapStation] = {}
+        self._nearby_fuel_type: str = ""
 
     async def async_step_user(
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> Any:
-        """Handle the initial step - select distrito."""
+        """Handle the initial step - search by distrito or nearby."""
+        return self.async_show_menu(
+            step_id="user",
+            menu_options=["distrito", "nearby", "cheapest"],
+        )
+
+    async def async_step_distrito(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Handle distrito selection."""
         if user_input is None:
             # Create distrito selection list
             distritos_list = {
@@ -80,7 +133,7 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
 
             return self.async_show_form(
-                step_id="user",
+                step_id="distrito",
                 data_schema=vol.Schema({
                     vol.Required("distrito_select"): vol.In(distritos_list)
                 })
@@ -88,11 +141,14 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         # Store selected distrito and fetch stations once
         self._distrito_id = int(user_input["distrito_select"])
-        session = async_get_clientsession(self.hass)
-        api = DGEG(session)
-        self._stations = await api.list_stations(self._distrito_id)
-
-        if not self._stations:
+        cache = async_get_station_list_cache(self.hass)
+        try:
+            self._catalogue = await cache.async_get_catalogue(self._distrito_id)
+        except DGEGError as err:
+            logger.error("Error fetching stations list: %s", err)
+            return self.async_abort(reason="cannot_connect")
+
+        if not self._catalogue:
             return self.async_abort(reason="no_stations")
 
         return await self.async_step_municipio()
@@ -102,17 +158,10 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> Any:
         """Handle municipio selection for selected distrito."""
         if user_input is None:
-            if not self._stations:
+            if not self._catalogue:
                 return self.async_abort(reason="no_stations")
 
-            municipios = sorted(
-                {
-                    str(station["Municipio"]).strip()
-                    for station in self._stations
-                    if station.get("Municipio") and str(station["Municipio"]).strip()
-                },
-                key=str.casefold,
-            )
+            municipios = self._catalogue.municipios
 
             if not municipios:
                 return self.async_abort(reason="no_stations")
@@ -129,13 +178,8 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
 
         self._selected_municipio = user_input["municipio_select"]
-        self._municipio_stations = [
-            station
-            for station in self._stations
-            if str(station.get("Municipio", "")).strip() == self._selected_municipio
-        ]
 
-        if not self._municipio_stations:
+        if not self._catalogue.brands(self._selected_municipio):
             return self.async_abort(reason="no_stations")
 
         return await self.async_step_brand()
@@ -145,18 +189,7 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> Any:
         """Handle brand selection for selected municipio."""
         if user_input is None:
-            if not self._municipio_stations:
-                return self.async_abort(reason="no_stations")
-
-            # Build sorted unique brands list
-            brands = sorted(
-                {
-                    station["Marca"].strip()
-                    for station in self._municipio_stations
-                    if station.get("Marca") and str(station["Marca"]).strip()
-                },
-                key=str.casefold,
-            )
+            brands = self._catalogue.brands(self._selected_municipio)
 
             if not brands:
                 return self.async_abort(reason="no_brands")
@@ -174,11 +207,8 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
 
         self._selected_brand = user_input["brand_select"]
-        self._filtered_stations = [
-            station
-            for station in self._municipio_stations
-            if str(station.get("Marca", "")).strip() == self._selected_brand
-        ]
+        self._filtered_stations = self._catalogue.stations(
+            self._selected_municipio, self._selected_brand)
 
         if not self._filtered_stations:
             return self.async_abort(reason="no_stations")
@@ -221,65 +251,200 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         # Store selected station details
         station_id = user_input["station_select"]
-        selected_station = next(
-            (station for station in self._filtered_stations if str(station["Id"]) == station_id),
-            None
-        )
+        selected_station = self._catalogue.get(station_id)
 
         if not selected_station:
             return self.async_abort(reason="station_not_found")
 
-        self._selected_station = {
-            CONF_STATIONID: str(selected_station["Id"]),
-            CONF_STATION_NAME: selected_station["Nome"],
-            CONF_STATION_BRAND: selected_station["Marca"],
-            CONF_STATION_ADDRESS: selected_station["Morada"]
-                if selected_station["Localidade"] == self._selected_municipio
-                else f"{selected_station['Morada']} - {selected_station['Localidade']}",
-        }
+        self._select_station(selected_station)
 
         return await self.async_step_fuel_types()
 
+    async def async_step_nearby(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Handle the search for the cheapest stations around a point."""
+        errors = {}
+        if user_input is not None:
+            location = user_input[CONF_LOCATION]
+            search = await async_import_module(self.hass, "search")
+            try:
+                self._nearby_stations = {
+                    str(cheap.station_id): cheap
+                    for cheap in await search.async_find_cheapest_stations(
+                        self.hass,
+                        location[CONF_LATITUDE],
+                        location[CONF_LONGITUDE],
+                        location.get(CONF_RADIUS, DEFAULT_RADIUS * 1000) / 1000,
+                        user_input[CONF_FUEL_TYPE],
+                        int(user_input[CONF_COUNT]),
+                    )
+                }
+            except DGEGError as err:
+                logger.error("Error searching nearby stations: %s", err)
+                self._nearby_stations = {}
+                errors["base"] = "cannot_connect"
+            if self._nearby_stations:
+                self._nearby_fuel_type = user_input[CONF_FUEL_TYPE]
+                return await self.async_step_nearby_station()
+            errors.setdefault("base", "no_nearby_stations")
+
+        return self.async_show_form(
+            step_id="nearby",
+            data_schema=vol.Schema({
+                vol.Required(CONF_FUEL_TYPE): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=FUEL_TYPES,
+                        custom_value=True,
+                    )
+                ),
+                vol.Required(
+                    CONF_LOCATION,
+                    default={
+                        CONF_LATITUDE: self.hass.config.latitude,
+                        CONF_LONGITUDE: self.hass.config.longitude,
+                        CONF_RADIUS: DEFAULT_RADIUS * 1000,
+                    },
+                ): selector.LocationSelector(
+                    selector.LocationSelectorConfig(radius=True)
+                ),
+                vol.Required(CONF_COUNT, default=DEFAULT_COUNT): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=20)
+                ),
+            }),
+            errors=errors,
+        )
+
+    async def async_step_nearby_station(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Handle station selection among the cheapest nearby."""
+        if user_input is None:
+            stations_list = {
+                station_id: (
+                    f"{cheap.price:.3f} {UNIT_OF_MEASUREMENT} - "
+                    f"{cheap.brand} {cheap.name} ({cheap.distance:.1f} km)"
+                )
+                for station_id, cheap in self._nearby_stations.items()
+            }
+
+            return self.async_show_form(
+                step_id="nearby_station",
+                data_schema=vol.Schema({
+                    vol.Required("station_select"): vol.In(stations_list)
+                }),
+                description_placeholders={
+                    "stations_count": str(len(stations_list)),
+                    "fuel_type": self._nearby_fuel_type,
+                }
+            )
+
+        cheap = self._nearby_stations.get(user_input["station_select"])
+        if not cheap:
+            return self.async_abort(reason="station_not_found")
+
+        self._distrito_id = cheap.distrito_id
+        self._selected_municipio = str(cheap.listing.get("Municipio") or "").strip()
+        self._select_station(cheap.listing)
+
+        return await self.async_step_fuel_types()
+
+    async def async_step_cheapest(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Handle the setup of a cheapest price sensor over configured stations."""
+        stations = {
+            str(entry.data[CONF_STATIONID]): entry.title
+            for entry in self._async_current_entries()
+            if entry.data.get(CONF_ENTRY_TYPE) != ENTRY_TYPE_CHEAPEST
+        }
+        if not stations:
+            return self.async_abort(reason="no_configured_stations")
+
+        errors = {}
+        if user_input is not None:
+            selected_stations = sorted(user_input.get(CONF_STATIONS, []), key=int)
+            if selected_stations:
+                fuel_type = user_input[CONF_FUEL_TYPE]
+                await self.async_set_unique_id(
+                    f"{ENTRY_TYPE_CHEAPEST}-{fuel_type}-{'-'.join(selected_stations)}")
+                self._abort_if_unique_id_configured()
+
+                return self.async_create_entry(
+                    title=f"{fuel_type} - {len(selected_stations)} stations",
+                    data={
+                        CONF_ENTRY_TYPE: ENTRY_TYPE_CHEAPEST,
+                        CONF_FUEL_TYPE: fuel_type,
+                        CONF_STATIONS: selected_stations,
+                    },
+                )
+            errors["base"] = "no_station_selected"
+
+        return self.async_show_form(
+            step_id="cheapest",
+            data_schema=vol.Schema({
+                vol.Required(CONF_FUEL_TYPE): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=FUEL_TYPES,
+                        custom_value=True,
+                    )
+                ),
+                vol.Required(CONF_STATIONS): cv.multi_select(stations),
+            }),
+            errors=errors,
+        )
+
+    def _select_station(self, station: Dict[str, Any]) -> None:
+        """Store the details of the selected station from the listing."""
+        self._selected_station = {
+            CONF_STATIONID: str(station["Id"]),
+            CONF_STATION_NAME: station["Nome"],
+            CONF_STATION_BRAND: station["Marca"],
+            CONF_STATION_ADDRESS: station["Morada"]
+                if station["Localidade"] == self._selected_municipio
+                else f"{station['Morada']} - {station['Localidade']}",
+            CONF_DISTRITO_ID: self._distrito_id,
+        }
+
     async def async_step_fuel_types(
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> Any:
         """Handle fuel types selection."""
         if user_input is None:
             # Get available fuel types from the selected station
-            session = async_get_clientsession(self.hass)
-            api = DGEG(session)
-            station = await api.get_station(int(self._selected_station[CONF_STATIONID]))
+            try:
+                station = await _async_get_station(
+                    self.hass, int(self._selected_station[CONF_STATIONID]))
+            except DGEGError as err:
+                logger.error("Error fetching gas station: %s", err)
+                return self.async_abort(reason="cannot_connect")
 
-            fuel_types = [fuel["TipoCombustivel"] for fuel in station.fuels]
+            self._station_fuel_types = station.fuel_types
 
-            if not fuel_types:
+            if not self._station_fuel_types:
                 return self.async_abort(reason="no_fuels")
 
             # Create checkboxes for fuel types
             return self.async_show_form(
                 step_id="fuel_types",
                 data_schema=vol.Schema({
-                    vol.Required("fuel_types_select"): cv.multi_select(fuel_types)
+                    vol.Required("fuel_types_select"): cv.multi_select(self._station_fuel_types)
                 }),
                 description_placeholders={
                     "station_name": self._selected_station[CONF_STATION_NAME],
                     "brand": self._selected_station[CONF_STATION_BRAND],
-                    "fuels_count": str(len(fuel_types)),
+                    "fuels_count": str(len(self._station_fuel_types)),
                 },
             )
 
         # Validate that at least one fuel type is selected
         selected_fuels = user_input.get("fuel_types_select", [])
         if not selected_fuels:
-            session = async_get_clientsession(self.hass)
-            api = DGEG(session)
-            station = await api.get_station(int(self._selected_station[CONF_STATIONID]))
-            fuel_types = [fuel["TipoCombustivel"] for fuel in station.fuels]
-
+            # Show the fuel types fetched for the first form again
             return self.async_show_form(
                 step_id="fuel_types",
                 data_schema=vol.Schema({
-                    vol.Required("fuel_types_select"): cv.multi_select(fuel_types)
+                    vol.Required("fuel_types_select"): cv.multi_select(self._station_fuel_types)
                 }),
                 errors={"base": "no_fuel_selected"},
             )
@@ -323,6 +488,10 @@ class PrecosCombustiveisConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class PrecosCombustiveisOptionsFlow(config_entries.OptionsFlow):
     """Options flow for PrecosCombustiveis integration."""
 
+    def __init__(self):
+        """Initialize options flow."""
+        self._available_fuel_types: list = []
+
     async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None) -> Any:
         """Handle options flow initial step."""
         # Redirect to fuel_types step
@@ -331,74 +500,89 @@ class PrecosCombustiveisOptionsFlow(config_entries.OptionsFlow):
     async def async_step_fuel_types(self, user_input: Optional[Dict[str, Any]] = None) -> Any:
         """Handle fuel types selection."""
         if user_input is None:
-            # Initialize instance variables
-            current_fuel_types = self.config_entry.data.get(CONF_FUEL_TYPES, [])
-            
             # Get available fuel types from the station
-            session = async_get_clientsession(self.hass)
-            api = DGEG(session)
             station_id = self.config_entry.data[CONF_STATIONID]
-            station = await api.get_station(int(station_id))
+            try:
+                station = await _async_get_station(self.hass, int(station_id))
+            except DGEGError as err:
+                logger.error("Error fetching gas station: %s", err)
+                return self.async_abort(reason="cannot_connect")
 
-            available_fuel_types = [fuel["TipoCombustivel"] for fuel in station.fuels]
+            self._available_fuel_types = station.fuel_types
 
-            if not available_fuel_types:
+            if not self._available_fuel_types:
                 return self.async_abort(reason="no_fuels")
 
-            # Create multi-select for fuel types with currently selected ones as defaults
-            return self.async_show_form(
-                step_id="fuel_types",
-                data_schema=vol.Schema({
-                    vol.Required(
-                        "fuel_types_select",
-                        default=current_fuel_types
-                    ): cv.multi_select(available_fuel_types)
-                }),
-                description_placeholders={
-                    "station_name": self.config_entry.data.get(CONF_STATION_NAME, station_id),
-                    "brand": self.config_entry.data.get(CONF_STATION_BRAND, ""),
-                    "fuels_count": str(len(available_fuel_types)),
-                },
-            )
+            return self._show_fuel_types_form(self._available_fuel_types)
 
         # Validate that at least one fuel type is selected
         selected_fuels = user_input.get("fuel_types_select", [])
         if not selected_fuels:
-            # Re-fetch data if validation fails
-            current_fuel_types = self.config_entry.data.get(CONF_FUEL_TYPES, [])
-            session = async_get_clientsession(self.hass)
-            api = DGEG(session)
-            station_id = self.config_entry.data[CONF_STATIONID]
-            station = await api.get_station(int(station_id))
-            available_fuel_types = [fuel["TipoCombustivel"] for fuel in station.fuels]
-            
-            station_id_err = self.config_entry.data[CONF_STATIONID]
-            return self.async_show_form(
-                step_id="fuel_types",
-                data_schema=vol.Schema({
-                    vol.Required(
-                        "fuel_types_select",
-                        default=current_fuel_types
-                    ): cv.multi_select(available_fuel_types)
-                }),
-                description_placeholders={
-                    "station_name": self.config_entry.data.get(CONF_STATION_NAME, station_id_err),
-                    "brand": self.config_entry.data.get(CONF_STATION_BRAND, ""),
-                    "fuels_count": str(len(available_fuel_types)),
-                },
-                errors={"base": "no_fuel_selected"},
-            )
+            return self._show_fuel_types_form(
+                self._available_fuel_types, errors={"base": "no_fuel_selected"})
 
         # Update the config entry data with new fuel types
         new_data = self.config_entry.data.copy()
         new_data[CONF_FUEL_TYPES] = selected_fuels
 
+        new_options = {
+            **self.config_entry.options,
+            CONF_COMPACT_ATTRIBUTES: user_input.get(CONF_COMPACT_ATTRIBUTES, False),
+            CONF_MIN_INTERVAL: user_input.get(
+                CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL_MINUTES),
+            CONF_MAX_INTERVAL: user_input.get(
+                CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL_MINUTES),
+            CONF_NATIONAL_PRICES: user_input.get(CONF_NATIONAL_PRICES, False),
+            CONF_MUNICIPIO_RANK: user_input.get(CONF_MUNICIPIO_RANK, False),
+        }
+
+        # Applied in place by the entry update listener, no reload needed
         self.hass.config_entries.async_update_entry(
             self.config_entry,
             data=new_data,
+            options=new_options,
         )
 
-        # Reload the config entry to apply changes
-        await self.hass.config_entries.async_reload(self.config_entry.entry_id)
-
-        return self.async_abort(reason="options_updated")
\ No newline at end of file
+        return self.async_abort(reason="options_updated")
+
+    def _show_fuel_types_form(self, available_fuel_types: list, errors: Optional[Dict[str, str]] = None) -> Any:
+        """Show the fuel types form, defaulting to the current options."""
+        options = self.config_entry.options
+        station_id = self.config_entry.data[CONF_STATIONID]
+
+        # Create multi-select for fuel types with currently selected ones as defaults
+        return self.async_show_form(
+            step_id="fuel_types",
+            data_schema=vol.Schema({
+                vol.Required(
+                    "fuel_types_select",
+                    default=self.config_entry.data.get(CONF_FUEL_TYPES, [])
+                ): cv.multi_select(available_fuel_types),
+                vol.Optional(
+                    CONF_COMPACT_ATTRIBUTES,
+                    default=options.get(CONF_COMPACT_ATTRIBUTES, False)
+                ): bool,
+                vol.Optional(
+                    CONF_MIN_INTERVAL,
+                    default=options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL_MINUTES)
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=1440)),
+                vol.Optional(
+                    CONF_MAX_INTERVAL,
+                    default=options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL_MINUTES)
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=1440)),
+                vol.Optional(
+                    CONF_NATIONAL_PRICES,
+                    default=options.get(CONF_NATIONAL_PRICES, False)
+                ): bool,
+                vol.Optional(
+                    CONF_MUNICIPIO_RANK,
+                    default=options.get(CONF_MUNICIPIO_RANK, False)
+                ): bool,
+            }),
+            description_placeholders={
+                "station_name": self.config_entry.data.get(CONF_STATION_NAME, station_id),
+                "brand": self.config_entry.data.get(CONF_STATION_BRAND, ""),
+                "fuels_count": str(len(available_fuel_types)),
+            },
+            errors=errors,
+        )
@@ -9,18 +9,61 @@ ATTRIBUTION = "Data provided by https://precoscombustiveis.dgeg.gov.pt/"
 DEFAULT_ICON = "mdi:gas-station"
 UNIT_OF_MEASUREMENT = "€/L"
 
+DATA_API = "api"
+DATA_COORDINATOR = "coordinator"
+DATA_COORDINATOR_LOCK = "coordinator_lock"
+DATA_STATION_LISTS = "station_lists"
+DATA_NATIONAL_PRICES = "national_prices"
+DATA_DISTRITO_LOOKUP = "distrito_lookup"
+
+EVENT_PRICE_CHANGED = f"{DOMAIN}_price_changed"
+SIGNAL_ENTRY_UPDATED = f"{DOMAIN}_entry_updated_{{}}"
+
 CONF_STATIONID = "stationId"
+CONF_STATIONS = "stations"
+CONF_ENTRY_TYPE = "entry_type"
+
+ENTRY_TYPE_STATION = "station"
+ENTRY_TYPE_CHEAPEST = "cheapest"
 CONF_FUEL_TYPES = "fuel_types"
+CONF_FUEL_TYPE = "fuel_type"
+CONF_COUNT = "count"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+CONF_NATIONAL_PRICES = "national_prices"
+CONF_MUNICIPIO_RANK = "municipio_rank"
+
+# Search of the cheapest stations around a point
+DEFAULT_RADIUS = 5.0  # km
+DEFAULT_COUNT = 5
+
+# Adaptive polling bounds, in minutes
+DEFAULT_MIN_INTERVAL_MINUTES = 15
+DEFAULT_MAX_INTERVAL_MINUTES = 360
 
 CONF_STATION_NAME = "station_name"
 CONF_STATION_BRAND = "station_brand"
 CONF_STATION_ADDRESS = "station_address"
+CONF_DISTRITO_ID = "distrito_id"
 
 # API endpoints
 API_ENDPOINT = "https://precoscombustiveis.dgeg.gov.pt/api/PrecoComb"
 API_STATIONS_LIST = f"{API_ENDPOINT}/PesquisarPostos?idDistrito={{}}&qtdPorPagina=99999&pagina=1"
 API_URI_TEMPLATE = f"{API_ENDPOINT}/GetDadosPosto?id={{}}"
 
+# Most common TipoCombustivel values, as named by DGEG
+FUEL_TYPES = [
+    "Gasóleo simples",
+    "Gasóleo especial",
+    "Gasóleo colorido",
+    "Gasolina simples 95",
+    "Gasolina especial 95",
+    "Gasolina 98",
+    "Gasolina especial 98",
+    "GPL Auto",
+]
+
 DISTRITOS = {
     1: "Aveiro",
     2: "Beja",
@@ -2,40 +2,437 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
 
-import aiohttp
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .dgeg import DGEG, Station
-from .const import DOMAIN
+from .dgeg import DGEG, DGEGError, Histogram, Station
+from .const import DOMAIN, EVENT_PRICE_CHANGED
+from .helpers import async_import_module
+from .history import PriceHistory
+from .price_index import PriceIndex
+from .scheduler import AdaptiveSchedule, DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL
+from .snapshot import StationSnapshots
 
 _LOGGER = logging.getLogger(__name__)
 
 UPDATE_INTERVAL = timedelta(minutes=60)
 
+# Shortest delay between two scheduled refreshes
+MIN_REFRESH_DELAY = timedelta(minutes=1)
 
-class PrecosCombustiveisCoordinator(DataUpdateCoordinator[Station]):
-    """Coordinator to manage fetching data from DGEG API."""
+# Stations restored at startup are refreshed after a delay, spread at random
+# over the jitter window so entries do not all hit DGEG at the same instant
+STARTUP_DELAY = timedelta(seconds=30)
+STARTUP_JITTER = timedelta(minutes=2)
 
-    def __init__(self, hass: HomeAssistant, api: DGEG, station_id: int) -> None:
+# A district listing holds the prices of all its stations in one request, but
+# weighs a few MB against about 1 kB for the details of a station: it is only
+# downloaded when this many stations of the district are due
+LISTING_MIN_STATIONS = 5
+
+# A listing fetched this recently, e.g. by a search or the national prices,
+# is used for any number of stations
+LISTING_MAX_AGE = timedelta(minutes=10)
+
+
+class RefreshStats:
+    """Timings and counters of the coordinator refreshes."""
+
+    __slots__ = (
+        "refreshes", "failed", "duration", "fanout",
+        "last_duration", "last_fetched", "last_errors",
+    )
+
+    def __init__(self) -> None:
+        self.refreshes = 0
+        self.failed = 0
+        self.duration = Histogram()
+        self.fanout = Histogram()
+        self.last_duration: float | None = None
+        self.last_fetched = 0
+        self.last_errors = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats, timings in milliseconds."""
+        return {
+            "refreshes": self.refreshes,
+            "failed": self.failed,
+            "last_duration_ms": (
+                round(self.last_duration * 1000, 1)
+                if self.last_duration is not None else None),
+            "last_fetched": self.last_fetched,
+            "last_errors": self.last_errors,
+            "duration": self.duration.as_dict(),
+            "listeners": self.fanout.as_dict(),
+        }
+
+
+class StationStats:
+    """When and how a station was last fetched, and its failed fetches."""
+
+    __slots__ = ("last_fetch", "source", "failures", "last_error")
+
+    def __init__(self) -> None:
+        self.last_fetch: datetime | None = None
+        self.source: str | None = None
+        self.failures = 0
+        self.last_error: str | None = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats."""
+        return {
+            "last_fetch": self.last_fetch.isoformat() if self.last_fetch else None,
+            "source": self.source,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class PrecosCombustiveisCoordinator(DataUpdateCoordinator[dict[int, Station]]):
+    """Coordinator shared by all config entries, fetching every tracked station.
+
+    Config entries register the stations they track with ``async_add_stations``
+    and release them with ``async_remove_station``. The station set is reference
+    counted, so several entries for the same station share a single request and
+    every entry is refreshed by the same scheduled update.
+
+    Each station has its own AdaptiveSchedule: a refresh only fetches the
+    stations that are due, and the next refresh is scheduled for the earliest
+    station due after that. Stations whose district is known are read from
+    the district listing when it is fresh or when enough of them are due,
+    the others are fetched one by one.
+
+    The last known data is persisted, so at startup entries are set up from
+    the previous run and refreshed in the background instead of waiting on
+    the network. Every price change fetched is also kept in the local
+    PriceHistory.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: DGEG) -> None:
         """Initialize the coordinator."""
         self._api = api
-        self._station_id = station_id
+        self._refcounts: dict[int, int] = {}
+        self._schedules: dict[int, AdaptiveSchedule] = {}
+        self._distritos: dict[int, int] = {}
+        self._snapshots = StationSnapshots(hass)
+        self._restored: dict[int, Station] = {}
+        self.price_index = PriceIndex()
+        self.history = PriceHistory(hass)
+        # State writes skipped by the sensors because nothing changed
+        self.skipped_writes = 0
+        self.refresh_stats = RefreshStats()
+        self.station_stats: dict[int, StationStats] = {}
         super().__init__(
             hass,
             _LOGGER,
-            name=f"{DOMAIN}_{station_id}",
+            name=DOMAIN,
             update_interval=UPDATE_INTERVAL,
         )
 
-    async def _async_update_data(self) -> Station:
-        """Fetch data from DGEG API."""
+    async def async_restore(self) -> None:
+        """Load the station data saved by the previous run."""
+        self._restored = await self._snapshots.async_load()
+        await self.history.async_load()
+        _LOGGER.debug("Restored %s gas stations", len(self._restored))
+
+    @property
+    def station_ids(self) -> list[int]:
+        """Return the ids of all tracked stations."""
+        return list(self._refcounts)
+
+    async def async_add_station(self, station_id: int) -> Station:
+        """Start tracking a station, fetching it if it is not known yet."""
+        return (await self.async_add_stations([station_id]))[station_id]
+
+    async def async_add_stations(
+        self,
+        station_ids: list[int],
+        min_interval: timedelta = DEFAULT_MIN_INTERVAL,
+        max_interval: timedelta = DEFAULT_MAX_INTERVAL,
+        distrito_id: int | None = None,
+    ) -> dict[int, Station]:
+        """Start tracking stations, fetching the ones not known yet.
+
+        The polling bounds apply to the stations not tracked yet, the others
+        keep theirs until changed with ``async_set_intervals``.
+        """
+        for station_id in station_ids:
+            if distrito_id is not None:
+                self._distritos[station_id] = distrito_id
+            self._refcounts[station_id] = self._refcounts.get(station_id, 0) + 1
+            if station_id not in self._schedules:
+                self._schedules[station_id] = AdaptiveSchedule(min_interval, max_interval)
+
+        known = self.data or {}
+        now = dt_util.utcnow()
+        restored = {}
+        for station_id in station_ids:
+            if station_id not in known and station_id in self._restored:
+                station = restored[station_id] = self._restored.pop(station_id)
+                self.price_index.update(station)
+                schedule = self._schedules[station_id]
+                schedule.record(station, now)
+                schedule.next_poll = now + STARTUP_DELAY + random.random() * STARTUP_JITTER
+        known = {**known, **restored}
+
+        stations, errors = await self._async_fetch_stations(
+            [station_id for station_id in station_ids if station_id not in known])
+        if errors:
+            # Keep the snapshots for the next attempt
+            self._restored.update(restored)
+            for station_id in station_ids:
+                self.async_remove_station(station_id)
+            err = next(iter(errors.values()))
+            raise ConfigEntryNotReady(
+                f"Error communicating with DGEG API: {err}"
+            ) from err
+
+        now = dt_util.utcnow()
+        for station in stations.values():
+            self.price_index.update(station)
+            self.history.async_record(station, now)
+            self._schedules[station.id].record(station, now)
+
+        # Merge into the current data without notifying listeners: other
+        # entries may have added stations, or a refresh may have completed,
+        # while the fetch was awaited
+        self.data = {
+            station_id: station
+            for station_id, station in {
+                **restored, **(self.data or {}), **stations}.items()
+            if station_id in self._refcounts
+        }
+        if stations:
+            self._async_save_snapshots(self.data)
+
+        # The new stations may be due before the refresh already scheduled
+        self._schedule_next_refresh(now)
+        if self._listeners:
+            self._schedule_refresh()
+        return {station_id: self.data[station_id] for station_id in station_ids}
+
+    @callback
+    def async_set_distrito(self, station_id: int, distrito_id: int) -> None:
+        """Record the district of a station, to read it from the listing."""
+        if station_id in self._refcounts:
+            self._distritos[station_id] = distrito_id
+
+    @callback
+    def async_set_intervals(
+        self, station_id: int, min_interval: timedelta, max_interval: timedelta
+    ) -> None:
+        """Change the polling bounds of a tracked station."""
+        schedule = self._schedules.get(station_id)
+        if schedule is None:
+            return
+        now = dt_util.utcnow()
+        schedule.set_bounds(min_interval, max_interval, now)
+        self._schedule_next_refresh(now)
+        if self._listeners:
+            self._schedule_refresh()
+
+    def async_remove_station(self, station_id: int) -> None:
+        """Stop tracking a station once no config entry references it."""
+        count = self._refcounts.get(station_id, 0) - 1
+        if count > 0:
+            self._refcounts[station_id] = count
+        else:
+            self._refcounts.pop(station_id, None)
+            self._schedules.pop(station_id, None)
+            self._distritos.pop(station_id, None)
+            self.station_stats.pop(station_id, None)
+            self.price_index.remove(station_id)
+            if self.data is not None:
+                self.data = {
+                    key: value
+                    for key, value in self.data.items()
+                    if key != station_id
+                }
+
+    def get_diagnostics(self, station_ids: list[int]) -> Dict[str, Any]:
+        """Return the refresh stats and the schedule of the given stations."""
+        return {
+            "tracked_stations": len(self._refcounts),
+            "update_interval": str(self.update_interval),
+            "skipped_writes": self.skipped_writes,
+            "refresh": self.refresh_stats.as_dict(),
+            "stations": {
+                str(station_id): {
+                    "min_interval": str(schedule.min_interval),
+                    "max_interval": str(schedule.max_interval),
+                    "next_poll": schedule.next_poll.isoformat(),
+                    "has_data": station_id in (self.data or {}),
+                    **(self.station_stats[station_id].as_dict()
+                       if station_id in self.station_stats else {}),
+                }
+                for station_id in station_ids
+                if (schedule := self._schedules.get(station_id)) is not None
+            },
+        }
+
+    def get_next_poll(self, station_id: int) -> datetime | None:
+        """Return when a tracked station is next due."""
+        schedule = self._schedules.get(station_id)
+        return schedule.next_poll if schedule else None
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, timing the sensor updates."""
+        started = time.monotonic()
+        super().async_update_listeners()
+        self.refresh_stats.fanout.observe(time.monotonic() - started)
+
+    async def _async_update_data(self) -> dict[int, Station]:
+        """Fetch data from DGEG API for the tracked stations that are due."""
+        stats = self.refresh_stats
+        started = time.monotonic()
         try:
-            station = await self._api.get_station(self._station_id)
-            if station is None:
-                raise UpdateFailed("No data returned from DGEG API")
-            return station
-        except aiohttp.ClientError as err:
+            return await self._async_fetch_due_stations()
+        except UpdateFailed:
+            stats.failed += 1
+            raise
+        finally:
+            stats.refreshes += 1
+            stats.last_duration = time.monotonic() - started
+            stats.duration.observe(stats.last_duration)
+
+    async def _async_fetch_due_stations(self) -> dict[int, Station]:
+        now = dt_util.utcnow()
+        due = [
+            station_id
+            for station_id in self.station_ids
+            if self._schedules[station_id].is_due(now + MIN_REFRESH_DELAY)
+        ]
+        # A refresh requested out of schedule fetches every station
+        stations, errors = await self._async_fetch_stations(due or self.station_ids)
+        self.refresh_stats.last_fetched = len(stations)
+        self.refresh_stats.last_errors = len(errors)
+
+        now = dt_util.utcnow()
+        previous = self.data or {}
+        for station_id, station in stations.items():
+            # Skip stations released while the refresh was running
+            if station_id in self._refcounts:
+                if station_id in previous:
+                    self._async_fire_price_changes(previous[station_id], station)
+                self.price_index.update(station)
+                self.history.async_record(station, now)
+                self._schedules[station_id].record(station, now)
+        for station_id in errors:
+            if station_id in self._schedules:
+                self._schedules[station_id].next_poll = (
+                    now + self._schedules[station_id].min_interval)
+        self._schedule_next_refresh(now)
+        _LOGGER.debug(
+            "Fetched %s gas stations, %s failed", len(stations), len(errors))
+
+        if errors and not stations:
+            err = next(iter(errors.values()))
             raise UpdateFailed(f"Error communicating with DGEG API: {err}") from err
+
+        for station_id, err in errors.items():
+            _LOGGER.warning(
+                "Keeping previous data for gas station %s: %s", station_id, err)
+
+        # Stations that failed or were not due keep their last known data
+        data = {
+            station_id: stations.get(station_id, previous.get(station_id))
+            for station_id in self.station_ids
+            if station_id in stations or station_id in previous
+        }
+        self._async_save_snapshots(data)
+        return data
+
+    async def _async_fetch_stations(
+        self, station_ids: list[int]
+    ) -> tuple[dict[int, Station], dict[int, Exception]]:
+        """Fetch stations, from their district listing where it saves requests.
+
+        Stations missing from the listings, or whose listing could not be
+        fetched, fall back to their own details.
+        """
+        by_distrito: dict[int, set[int]] = {}
+        for station_id in station_ids:
+            distrito_id = self._distritos.get(station_id)
+            if distrito_id is not None:
+                by_distrito.setdefault(distrito_id, set()).add(station_id)
+
+        stations: dict[int, Station] = {}
+        if by_distrito:
+            # Loaded once some station is known to be listed
+            cache_module = await async_import_module(self.hass, "cache")
+            cache = cache_module.async_get_station_list_cache(self.hass)
+        for distrito_id, wanted in by_distrito.items():
+            try:
+                listing = await cache.async_get_recent(
+                    distrito_id, LISTING_MAX_AGE,
+                    fetch=len(wanted) >= LISTING_MIN_STATIONS)
+            except DGEGError as err:
+                _LOGGER.debug("Stations list for distrito %s failed: %s", distrito_id, err)
+                continue
+            for entry in listing or []:
+                if int(entry["Id"]) in wanted:
+                    station = Station.from_listing(entry)
+                    stations[station.id] = station
+        listed = set(stations)
+
+        fetched, errors = await self._api.get_stations(
+            station_id for station_id in station_ids if station_id not in stations)
+        stations.update(fetched)
+
+        now = dt_util.utcnow()
+        for station_id in stations.keys() & self._refcounts.keys():
+            stats = self._get_station_stats(station_id)
+            stats.last_fetch = now
+            stats.source = "PesquisarPostos" if station_id in listed else "GetDadosPosto"
+        for station_id in errors.keys() & self._refcounts.keys():
+            stats = self._get_station_stats(station_id)
+            stats.failures += 1
+            stats.last_error = str(errors[station_id])
+        return stations, errors
+
+    def _get_station_stats(self, station_id: int) -> StationStats:
+        """Return the stats of a tracked station, created on first use."""
+        stats = self.station_stats.get(station_id)
+        if stats is None:
+            stats = self.station_stats[station_id] = StationStats()
+        return stats
+
+    @callback
+    def _async_fire_price_changes(self, previous: Station, station: Station) -> None:
+        """Fire an event for every fuel whose price changed since the last fetch."""
+        for fuel in station.fuels:
+            old_price = previous.get_price(fuel.name)
+            if not fuel.price or not old_price or fuel.price == old_price:
+                continue
+            self.hass.bus.async_fire(EVENT_PRICE_CHANGED, {
+                "station_id": station.id,
+                "station_name": station.name,
+                "brand": station.brand,
+                "fuel_type": fuel.name,
+                "old_price": old_price,
+                "new_price": fuel.price,
+                "delta": round(fuel.price - old_price, 3),
+                "last_update": fuel.last_update.isoformat() if fuel.last_update else None,
+            })
+
+    @callback
+    def _async_save_snapshots(self, data: dict[int, Station]) -> None:
+        """Persist the last known data, keeping snapshots not claimed yet."""
+        self._snapshots.async_save({**self._restored, **data})
+
+    def _schedule_next_refresh(self, now) -> None:
+        """Set the update interval to wake up for the next station due."""
+        if not self._schedules:
+            self.update_interval = UPDATE_INTERVAL
+            return
+        next_poll = min(schedule.next_poll for schedule in self._schedules.values())
+        self.update_interval = max(next_poll - now, MIN_REFRESH_DELAY)
+        _LOGGER.debug("Next DGEG refresh in %s", self.update_interval)
@@ -1,8 +1,15 @@
 """API to DGEG."""
 
+import asyncio
+import json
 import logging
-from typing import Dict
+import random
+import re
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator
 from datetime import datetime
+from urllib.parse import urlsplit
 import aiohttp
 
 from .const import (
@@ -13,13 +20,380 @@ from .const import (
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_RATE_LIMIT = 5.0  # requests per second, per host
+DEFAULT_RATE_BURST = 5
+DEFAULT_TIMEOUT = 10.0  # seconds, per attempt
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.5  # seconds, doubled on every retry and jittered
+
+# An endpoint is left alone for CIRCUIT_RESET_TIMEOUT seconds after this
+# many consecutive connection failures
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 300
+
+# Stations fetched are kept this long, in seconds, for get_station(max_age=...)
+STATION_CACHE_TTL = 300
+
+# Upper bounds, in seconds, of the timing histogram buckets
+TIMING_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fields of the PesquisarPostos listing kept in memory, the rest is dropped.
+# The price rows of a station are gathered in "Combustiveis", as
+# {TipoCombustivel: [price, DataAtualizacao]}
+STATION_LIST_FIELDS = (
+    "Id", "Nome", "Marca", "TipoPosto", "Municipio", "Localidade", "Morada",
+    "CodPostal", "Latitude", "Longitude",
+)
+
+_RESULTADO_RE = re.compile(r'"resultado"\s*:\s*')
+_WHITESPACE_RE = re.compile(r'[\s,]*')
+
+
+def _safe_lower(value):
+    return value.lower() if isinstance(value, str) else ""
+
+
+def _station_sort_key(station: Dict):
+    return (
+        _safe_lower(station.get('Municipio')),
+        _safe_lower(station.get('Localidade')),
+        _safe_lower(station.get('Marca')),
+        _safe_lower(station.get('Nome'))
+    )
+
+
+def iter_stations_list(body: bytes) -> Iterator[Dict]:
+    """Yield the elements of a PesquisarPostos ``resultado`` one at a time.
+
+    Each element is decoded on its own, so the caller can trim or discard it
+    before the next one is read. Blocking, run it in the executor.
+    """
+    text = body.decode("utf-8-sig")
+    match = _RESULTADO_RE.search(text)
+    if match is None or text[match.end():match.end() + 1] != "[":
+        # Unexpected layout (or "resultado": null), decode it as a whole
+        yield from json.loads(text).get('resultado') or []
+        return
+
+    decoder = json.JSONDecoder()
+    pos = match.end() + 1
+    while True:
+        pos = _WHITESPACE_RE.match(text, pos).end()
+        if text[pos] == "]":
+            return
+        station, pos = decoder.raw_decode(text, pos)
+        yield station
+
+
+def parse_stations_list(body: bytes) -> list[Dict]:
+    """Parse a PesquisarPostos response one station at a time.
+
+    DGEG lists a station once per fuel. Each row is trimmed to
+    STATION_LIST_FIELDS before the next one is read, so the full station
+    dicts never coexist in memory, and the rows of a station are merged into
+    one entry holding the price of every fuel. Blocking, run it in the
+    executor.
+    """
+    by_id: Dict[Any, Dict] = {}
+    for row in iter_stations_list(body):
+        station = by_id.get(row.get("Id"))
+        if station is None:
+            station = by_id[row.get("Id")] = {
+                field: row.get(field) for field in STATION_LIST_FIELDS}
+            station["Combustiveis"] = {}
+        fuel_type = row.get("Combustivel")
+        try:
+            price = parse_price(row.get("Preco"))
+        except ValueError:
+            continue
+        if fuel_type and price:
+            station["Combustiveis"][fuel_type] = [price, row.get("DataAtualizacao")]
+    stations = list(by_id.values())
+
+    # Sort stations by name for better display (handle None values defensively)
+    stations.sort(key=_station_sort_key)
+    return stations
+
+
+class RateLimiter:
+    """Token bucket limiting the request rate to a single host."""
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be issued."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._burst,
+                    self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class DGEGError(Exception):
+    """Error talking to the DGEG API."""
+
+
+class DGEGConnectionError(DGEGError):
+    """DGEG could not be reached: network error, timeout or 5xx answer."""
+
+
+class DGEGCircuitOpenError(DGEGConnectionError):
+    """Requests to a DGEG endpoint are suspended after repeated failures."""
+
+
+class DGEGResponseError(DGEGError):
+    """DGEG answered, but not with the expected payload."""
+
+
+class CircuitBreaker:
+    """Reject the calls to an endpoint for a while after consecutive failures.
+
+    Once reset_timeout has elapsed the circuit is half-open: a single trial
+    call is let through while the others are still rejected. The circuit
+    closes if the trial succeeds and opens again if it fails.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    def allow_request(self) -> bool:
+        """Return whether a call may go through, admitting the half-open trial."""
+        if self._opened_at is None:
+            return True
+        if self._trial or time.monotonic() - self._opened_at < self._reset_timeout:
+            return False
+        self._trial = True
+        return True
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit past the threshold or on a failed trial."""
+        self._failures += 1
+        if self._trial or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+        self._trial = False
+
+    def release(self) -> None:
+        """Let another call try after an admitted call ended without an outcome."""
+        self._trial = False
+
+
+class Histogram:
+    """Count of timings per bucket, with their total and maximum."""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(TIMING_BUCKETS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Count a timing."""
+        self.counts[bisect_left(TIMING_BUCKETS, seconds)] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> Dict:
+        """Return the histogram, timings in milliseconds."""
+        count = sum(self.counts)
+        return {
+            "count": count,
+            "avg_ms": round(self.total / count * 1000, 1) if count else None,
+            "max_ms": round(self.max * 1000, 1),
+            "buckets": {
+                f"<={bound * 1000:g}ms" if bound != float("inf") else "inf": bucket
+                for bound, bucket in zip((*TIMING_BUCKETS, float("inf")), self.counts)
+            },
+        }
+
+
+class EndpointMetrics:
+    """Counters and timings of the requests to one DGEG endpoint."""
+
+    __slots__ = (
+        "successes", "failures", "timeouts", "retries", "rejected",
+        "latency", "decode", "bytes_total", "bytes_max", "last_error",
+    )
+
+    def __init__(self) -> None:
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latency = Histogram()
+        self.decode = Histogram()
+        self.bytes_total = 0
+        self.bytes_max = 0
+        self.last_error: str | None = None
+
+    def observe_response(self, size: int) -> None:
+        """Count a response body of size bytes."""
+        self.bytes_total += size
+        if size > self.bytes_max:
+            self.bytes_max = size
+
+    def as_dict(self) -> Dict:
+        """Return the metrics of the endpoint."""
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "latency": self.latency.as_dict(),
+            "decode": self.decode.as_dict(),
+            "bytes_total": self.bytes_total,
+            "bytes_max": self.bytes_max,
+            "last_error": self.last_error,
+        }
+
+
+class FetchMetrics:
+    """Metrics of the requests issued to DGEG, per endpoint.
+
+    Recording a request costs a few counter updates and a bisect, so it is
+    always on. DNS and connection timings are only filled in when the
+    session reports them, see client.async_get_dgeg.
+    """
+
+    __slots__ = ("endpoints", "dns", "connect")
+
+    def __init__(self) -> None:
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self.dns = Histogram()
+        self.connect = Histogram()
+
+    def endpoint(self, url: str) -> EndpointMetrics:
+        """Return the metrics of the endpoint serving the given url."""
+        name = urlsplit(url).path.rsplit("/", 1)[-1]
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    @property
+    def requests(self) -> int:
+        """Return the number of requests issued, retries included."""
+        return sum(sum(metrics.latency.counts) for metrics in self.endpoints.values())
+
+    @property
+    def failures(self) -> int:
+        """Return the number of failed requests."""
+        return sum(metrics.failures for metrics in self.endpoints.values())
+
+    def as_dict(self) -> Dict:
+        """Return every metric."""
+        return {
+            "endpoints": {
+                name: metrics.as_dict() for name, metrics in self.endpoints.items()
+            },
+            "dns": self.dns.as_dict(),
+            "connect": self.connect.as_dict(),
+        }
+
+
+def parse_price(value) -> float:
+    """Parse a DGEG price such as "1,789 €/litro" into a float."""
+    if not value:
+        return 0
+    return float(value
+        .replace(" €/litro", "")
+        .replace(" €", "")
+        .replace(",", "."))
+
+
+def parse_datetime(value) -> datetime | None:
+    """Parse a DGEG timestamp such as "2024-01-31 08:15"."""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d %H:%M')
+
+
+def _parse_float(value) -> float | None:
+    """Parse a coordinate, None if it is missing."""
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+class Fuel:
+    """Represents the PRICE of a fuel at a station."""
+
+    __slots__ = ("name", "price", "last_update")
+
+    def __init__(self, name: str, price: float, last_update: datetime | None):
+        self.name = name
+        self.price = price
+        self.last_update = last_update
+
+    def __repr__(self) -> str:
+        return f"Fuel({self.name!r}, {self.price!r}, {self.last_update!r})"
+
+
 class Station:
-    """Represents a STATION card."""
+    """Represents a STATION card.
+
+    The API payload is parsed once on creation and not kept around: prices
+    are floats, timestamps are datetimes and fuels are indexed by name.
+    """
+
+    __slots__ = (
+        "_id", "_name", "_brand", "_type", "_address",
+        "_latitude", "_longitude", "_fuels",
+    )
 
     def __init__(self, id, data):
         self._id = id
-        self._data = data
-        
+        self._name = data["Nome"]
+        self._brand = data["Marca"]
+        self._type = data["TipoPosto"]
+
+        morada = data.get("Morada")
+        if morada:
+            self._address = [
+                morada["Morada"],
+                morada["Localidade"],
+                morada["CodPostal"]
+            ]
+            self._latitude = _parse_float(morada.get("Latitude"))
+            self._longitude = _parse_float(morada.get("Longitude"))
+        else:
+            self._address = []
+            self._latitude = None
+            self._longitude = None
+
+        self._fuels: dict[str, Fuel] = {
+            fuel["TipoCombustivel"]: Fuel(
+                fuel["TipoCombustivel"],
+                parse_price(fuel.get("Preco")),
+                parse_datetime(fuel.get("DataAtualizacao")))
+            for fuel in data.get("Combustiveis") or []
+        }
+
     @property
     def id(self):
         """Return the station ID."""
@@ -28,127 +402,308 @@ class Station:
     @property
     def name(self):
         """Return the station NAME."""
-        return self._data["Nome"]
+        return self._name
 
     @property
     def brand(self):
         """Return the station BRAND."""
-        return self._data["Marca"]
+        return self._brand
 
     @property
     def type(self):
         """Return the station TYPE."""
-        return self._data["TipoPosto"]
+        return self._type
 
     @property
     def address(self) -> list[str]:
         """Return the station ADDRESS."""
-        if self._data["Morada"]:
-            return [
-                self._data["Morada"]["Morada"],
-                self._data["Morada"]["Localidade"],
-                self._data["Morada"]["CodPostal"]
-            ]
-        else:
-            return []
+        return self._address
 
     @property
-    def latitude(self) -> float:
+    def latitude(self) -> float | None:
         """Return the station LATITUDE."""
-        return float(self._data["Morada"]["Latitude"])
-    
+        return self._latitude
+
     @property
-    def longitude(self) -> float:
+    def longitude(self) -> float | None:
         """Return the station LONGITUDE."""
-        return float(self._data["Morada"]["Longitude"])
+        return self._longitude
 
     @property
-    def fuels(self):
+    def fuels(self) -> list[Fuel]:
         """Return the station FUELS."""
-        return self._data["Combustiveis"]
+        return list(self._fuels.values())
+
+    @property
+    def fuel_types(self) -> list[str]:
+        """Return the names of the station FUELS."""
+        return list(self._fuels)
+
+    def get_fuel(self, fuel_type) -> Fuel | None:
+        """Return the station FUEL for a given fuel type."""
+        return self._fuels.get(fuel_type)
 
     def get_last_update(self, fuel_type) -> datetime | None:
         """Return the station LAST UPDATE for a given fuel type."""
-        fuel = [f for f in self._data["Combustiveis"] if f["TipoCombustivel"] == fuel_type][0]
-        if fuel and fuel.get("DataAtualizacao"):
-            return datetime.strptime(
-                fuel["DataAtualizacao"],
-                '%Y-%m-%d %H:%M')
-        return None
+        fuel = self._fuels.get(fuel_type)
+        return fuel.last_update if fuel else None
 
     def get_price(self, fuel_type) -> float:
         """Return the station PRICE for a given fuel type."""
-        fuel = [f for f in self._data["Combustiveis"] if f["TipoCombustivel"] == fuel_type][0]
-        if fuel and fuel.get("Preco"):               
-            return float(fuel["Preco"]
-                .replace(" €/litro", "")
-                .replace(",", "."))
-        else:
-            return 0
+        fuel = self._fuels.get(fuel_type)
+        return fuel.price if fuel else 0
+
+    @classmethod
+    def restore(cls, id, name, brand, type, address, latitude, longitude,
+                fuels: Iterable[Fuel]) -> "Station":
+        """Rebuild a station from already parsed values."""
+        station = cls.__new__(cls)
+        station._id = id
+        station._name = name
+        station._brand = brand
+        station._type = type
+        station._address = address
+        station._latitude = latitude
+        station._longitude = longitude
+        station._fuels = {fuel.name: fuel for fuel in fuels}
+        return station
+
+    @classmethod
+    def from_listing(cls, station: Dict) -> "Station":
+        """Build a station from an entry of parse_stations_list."""
+        return cls.restore(
+            int(station["Id"]),
+            station["Nome"],
+            station["Marca"],
+            station.get("TipoPosto"),
+            [station["Morada"], station["Localidade"], station.get("CodPostal")],
+            _parse_float(station.get("Latitude")),
+            _parse_float(station.get("Longitude")),
+            [
+                Fuel(fuel_type, price, parse_datetime(last_update))
+                for fuel_type, (price, last_update)
+                in (station.get("Combustiveis") or {}).items()
+            ])
+
 
 class DGEG:
-    """Interfaces to https://precoscombustiveis.dgeg.gov.pt/"""
+    """Interfaces to https://precoscombustiveis.dgeg.gov.pt/
+
+    The websession is expected to carry the connection settings (headers,
+    SSL) shared by every request, see client.async_get_dgeg.
 
-    def __init__(self, websession):
+    Every request has a deadline, is retried with jittered exponential
+    backoff on timeouts, network errors and 5xx answers, and goes through a
+    circuit breaker per endpoint. Failures raise DGEGError subclasses.
+    """
+
+    def __init__(self, websession,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 rate_limit: float = DEFAULT_RATE_LIMIT,
+                 rate_burst: int = DEFAULT_RATE_BURST,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES,
+                 metrics: FetchMetrics | None = None):
         self.websession = websession
+        self._max_concurrency = max_concurrency
+        self._rate_limit = rate_limit
+        self._rate_burst = rate_burst
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._retries = retries
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Stations fetched in the last STATION_CACHE_TTL seconds, oldest first,
+        # with their monotonic time
+        self._stations: Dict[int, tuple[float, Station]] = {}
+        self.metrics = metrics or FetchMetrics()
 
-    async def list_stations(self, distrito_id: int) -> list[Dict]:
-        """Get list of all stations."""
-        try:
-            logger.info(
-                "Fetching stations list for distrito Id:%s (%s)...",
-                distrito_id,
-                DISTRITOS[distrito_id])
+    async def _throttle(self, url: str) -> None:
+        """Wait for the rate limiter of the host serving the given url."""
+        host = urlsplit(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = RateLimiter(
+                self._rate_limit, self._rate_burst)
+        await limiter.acquire()
 
-            async with self.websession.get(
-                API_STATIONS_LIST.format(distrito_id),
-                headers={
-                    "Content-Type": "application/json" 
-                },
-                ssl=False  # Disable SSL verification
-            ) as res:
-                if res.status == 200:
-                    json = await res.json()
-                    # Sort stations by name for better display (handle None values defensively)
-                    def _safe_lower(value):
-                        return value.lower() if isinstance(value, str) else ""
-
-                    return sorted(
-                        json.get('resultado') or [],
-                        key=lambda x: (
-                            _safe_lower(x.get('Municipio')),
-                            _safe_lower(x.get('Localidade')),
-                            _safe_lower(x.get('Marca')),
-                            _safe_lower(x.get('Nome'))
-                        )
-                    )
-                else:
-                    logger.error("Failed to fetch stations list. Status: %s", res.status)
-                    return []
-        except Exception as ex:
-            logger.error("Error fetching stations list: %s", ex)
-            return []
-
-    async def get_station(self, station_id: int) -> Station:
-        """Issue GAS STATION requests."""
+    def _breaker(self, url: str) -> CircuitBreaker:
+        """Return the circuit breaker of the endpoint serving the given url."""
+        parts = urlsplit(url)
+        endpoint = parts.netloc + parts.path
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(
+                CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+        return breaker
+
+    async def _fetch_once(self, url: str, headers: Dict[str, str] | None,
+                          metrics: EndpointMetrics):
+        """Issue a single GET, return its status, headers, body and content type."""
         try:
-            logger.debug("Fetching details for gas station Id: %s...", station_id)
             async with self.websession.get(
-                API_URI_TEMPLATE.format(station_id),
-                headers={ 
-                    "Content-Type": "application/json" 
-                },
-                ssl=False  # Disable SSL verification
+                url, headers=headers, timeout=self._timeout
             ) as res:
-                if res.status == 200 and res.content_type == "application/json":
-                    json = await res.json()
-                    return Station(
-                        station_id,
-                        json['resultado'])
-                raise Exception("Could not retrieve gas station details from API")
+                body = await res.read()
+        except asyncio.TimeoutError as err:
+            metrics.timeouts += 1
+            raise DGEGConnectionError(
+                f"Timeout after {self._timeout.total}s: {url}") from err
         except aiohttp.ClientError as err:
-            logger.error(err)
-            raise err
+            raise DGEGConnectionError(f"{err.__class__.__name__}: {err}") from err
+
+        metrics.observe_response(len(body))
+        if res.status >= 500:
+            raise DGEGConnectionError(f"Status {res.status}: {url}")
+        return res.status, res.headers, body, res.content_type
+
+    async def _request(self, url: str, headers: Dict[str, str] | None = None):
+        """Issue a GET with retries, behind the rate limiter and circuit breaker."""
+        breaker = self._breaker(url)
+        metrics = self.metrics.endpoint(url)
+        attempt = 0
+        while True:
+            if not breaker.allow_request():
+                metrics.rejected += 1
+                raise DGEGCircuitOpenError(
+                    f"Requests suspended after repeated failures: {url}")
+
+            try:
+                await self._throttle(url)
+                started = time.monotonic()
+                result = await self._fetch_once(url, headers, metrics)
+            except DGEGConnectionError as err:
+                metrics.latency.observe(time.monotonic() - started)
+                metrics.failures += 1
+                metrics.last_error = str(err)
+                breaker.record_failure()
+                if attempt >= self._retries:
+                    raise
+                metrics.retries += 1
+                await asyncio.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled, a half-open trial must not keep the circuit open
+                breaker.release()
+                raise
+
+            metrics.latency.observe(time.monotonic() - started)
+            metrics.successes += 1
+            breaker.record_success()
+            return result
+
+    async def list_stations(self, distrito_id: int) -> list[Dict]:
+        """Get list of all stations."""
+        stations, _, _ = await self.fetch_stations_list(distrito_id)
+        return stations or []
+
+    async def fetch_stations_list(
+        self,
+        distrito_id: int,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> tuple[list[Dict] | None, str | None, str | None]:
+        """Get list of all stations, revalidating a previously fetched copy.
+
+        Returns the sorted stations along with the ETag and Last-Modified
+        validators sent by the server. The stations are None when the server
+        answers 304 Not Modified to the given validators.
+        """
+        logger.info(
+            "Fetching stations list for distrito Id:%s (%s)...",
+            distrito_id,
+            DISTRITOS[distrito_id])
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        url = API_STATIONS_LIST.format(distrito_id)
+        status, res_headers, body, _ = await self._request(url, headers)
+        etag = res_headers.get("ETag", etag)
+        last_modified = res_headers.get("Last-Modified", last_modified)
+        if status == 304:
+            return None, etag, last_modified
+        if status != 200:
+            raise DGEGResponseError(
+                f"Failed to fetch stations list. Status: {status}")
+
+        started = time.monotonic()
+        try:
+            stations = await asyncio.get_running_loop().run_in_executor(
+                None, parse_stations_list, body)
+        except (ValueError, AttributeError, IndexError) as err:
+            raise DGEGResponseError(f"Invalid stations list: {err}") from err
+        finally:
+            self.metrics.endpoint(url).decode.observe(time.monotonic() - started)
+        return stations, etag, last_modified
+
+    async def get_station(self, station_id: int, max_age: float | None = None) -> Station:
+        """Issue GAS STATION requests.
+
+        With max_age, a station fetched less than max_age seconds ago (by any
+        caller of this client) is returned without a request. Stations are
+        only kept for STATION_CACHE_TTL seconds, whatever the max_age.
+        """
+        if max_age is not None:
+            cached = self._stations.get(station_id)
+            if cached is not None and time.monotonic() - cached[0] < max_age:
+                return cached[1]
+
+        logger.debug("Fetching details for gas station Id: %s...", station_id)
+        url = API_URI_TEMPLATE.format(station_id)
+        status, _, body, content_type = await self._request(url)
+        if status != 200 or content_type != "application/json":
+            raise DGEGResponseError(
+                f"Could not retrieve gas station {station_id} details from API "
+                f"(status {status}, {content_type})")
+        started = time.monotonic()
+        try:
+            station = Station(station_id, json.loads(body)["resultado"])
+        except (ValueError, KeyError, TypeError) as err:
+            raise DGEGResponseError(
+                f"Invalid details for gas station {station_id}: {err!r}") from err
+        finally:
+            self.metrics.endpoint(url).decode.observe(time.monotonic() - started)
+        self._cache_station(station_id, station)
+        return station
+
+    def _cache_station(self, station_id: int, station: Station) -> None:
+        """Keep a fetched station, dropping the ones kept for too long."""
+        now = time.monotonic()
+        self._stations.pop(station_id, None)
+        self._stations[station_id] = (now, station)
+        # Insertion order is fetch order: expired stations are at the front
+        while self._stations:
+            oldest, (fetched, _) = next(iter(self._stations.items()))
+            if now - fetched < STATION_CACHE_TTL:
+                break
+            del self._stations[oldest]
+
+    async def get_stations(
+        self, station_ids: Iterable[int], max_concurrency: int | None = None
+    ) -> tuple[Dict[int, Station], Dict[int, Exception]]:
+        """Issue GAS STATION requests for several stations concurrently.
+
+        At most ``max_concurrency`` requests are in flight at once, on top of
+        the per-host rate limit. Returns the stations that could be fetched
+        and the error raised for each one that could not.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self._max_concurrency)
+        stations: Dict[int, Station] = {}
+        errors: Dict[int, Exception] = {}
+
+        async def _fetch(station_id: int) -> None:
+            async with semaphore:
+                try:
+                    stations[station_id] = await self.get_station(station_id)
+                except DGEGError as err:
+                    errors[station_id] = err
+
+        await asyncio.gather(*(_fetch(station_id) for station_id in set(station_ids)))
+        return stations, errors
 
     async def test_station(self, station_id: int) -> str:
         """Test if gas stationId exists."""
@@ -0,0 +1,32 @@
+"""Diagnostics support for PrecosCombustiveis."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_API
+from .coordinator import PrecosCombustiveisCoordinator
+from .dgeg import DGEG
+from .helpers import get_entry_station_ids
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return the refresh stats and the DGEG request metrics.
+
+    The coordinator and the DGEG client are shared, so the refresh stats and
+    request metrics cover every entry; the schedule is the entry stations'.
+    """
+    coordinator: PrecosCombustiveisCoordinator = hass.data[DOMAIN][entry.entry_id]
+    api: DGEG = hass.data[DOMAIN][DATA_API]
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "coordinator": coordinator.get_diagnostics(get_entry_station_ids(entry)),
+        "requests": api.metrics.as_dict(),
+    }
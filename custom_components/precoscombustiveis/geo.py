@@ -0,0 +1,87 @@
+"""Spatial index of the stations, to search stations around a point."""
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, NamedTuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+# Grid cell size in degrees, about 5.5 km of latitude
+CELL_SIZE = 0.05
+
+
+class NearbyStation(NamedTuple):
+    """A station found around a point."""
+
+    distance: float
+    distrito_id: int
+    station: Dict
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance between two points in km."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (math.sin(dphi / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(value: float) -> int:
+    return math.floor(value / CELL_SIZE)
+
+
+def _coordinate(value) -> float | None:
+    """Return a listing coordinate as a float, None if it is missing."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class StationGrid:
+    """Fixed-size lat/lon grid over the stations of one or more districts.
+
+    A query only visits the cells overlapping the bounding box of the search
+    radius, instead of computing the distance to every station in the country.
+    """
+
+    def __init__(self, listings: Dict[int, Iterable[Dict]]):
+        self._cells: Dict[tuple[int, int], list[tuple[float, float, int, Dict]]] = {}
+        seen: set = set()
+        for distrito_id, stations in listings.items():
+            for station in stations:
+                if station["Id"] in seen:
+                    continue
+                latitude = _coordinate(station.get("Latitude"))
+                longitude = _coordinate(station.get("Longitude"))
+                if latitude is None or longitude is None:
+                    continue
+                seen.add(station["Id"])
+                self._cells.setdefault(
+                    (_cell(latitude), _cell(longitude)), []
+                ).append((latitude, longitude, distrito_id, station))
+        self._count = len(seen)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def nearby(self, latitude: float, longitude: float,
+               radius: float) -> list[NearbyStation]:
+        """Return the stations within radius km of a point, nearest first."""
+        dlat = radius / KM_PER_DEGREE
+        dlon = radius / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+
+        found = []
+        for row in range(_cell(latitude - dlat), _cell(latitude + dlat) + 1):
+            for col in range(_cell(longitude - dlon), _cell(longitude + dlon) + 1):
+                for lat, lon, distrito_id, station in self._cells.get((row, col), ()):
+                    distance = haversine(latitude, longitude, lat, lon)
+                    if distance <= radius:
+                        found.append(NearbyStation(distance, distrito_id, station))
+
+        found.sort(key=lambda nearby: nearby.distance)
+        return found
@@ -0,0 +1,48 @@
+"""Helpers shared by the integration setup and its platforms."""
+from __future__ import annotations
+
+import importlib
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import ModuleType
+
+from homeassistant import config_entries
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ENTRY_TYPE, CONF_STATIONID, CONF_STATIONS, ENTRY_TYPE_CHEAPEST
+
+
+def get_entry_station_ids(entry: ConfigEntry) -> list[int]:
+    """Return the ids of the stations a config entry tracks."""
+    if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_CHEAPEST:
+        return [int(station_id) for station_id in entry.data[CONF_STATIONS]]
+    return [int(entry.data[CONF_STATIONID])]
+
+
+async def async_import_module(hass: HomeAssistant, name: str) -> ModuleType:
+    """Return a module of the integration, loaded on first use.
+
+    The first import runs in the import executor, like Home Assistant does
+    for the integration and its platforms, so it never blocks the event loop.
+    """
+    name = f"{__package__}.{name}"
+    module = sys.modules.get(name)
+    if module is None:
+        module = await hass.async_add_import_executor_job(importlib.import_module, name)
+    return module
+
+
+@contextmanager
+def outside_config_entry() -> Iterator[None]:
+    """Create a coordinator shared by every entry, bound to none of them.
+
+    A DataUpdateCoordinator created while an entry is being set up is bound
+    to it, and shut down when that entry unloads.
+    """
+    token = config_entries.current_entry.set(None)
+    try:
+        yield
+    finally:
+        config_entries.current_entry.reset(token)
@@ -0,0 +1,181 @@
+"""Local price history of the tracked stations."""
+from __future__ import annotations
+
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .dgeg import Station
+from .scheduler import DGEG_TIME_ZONE
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.history"
+
+# Coalesce the writes of consecutive refreshes
+SAVE_DELAY = 300
+
+# Rows older than this are dropped when the history is loaded
+RETENTION = timedelta(days=2 * 365)
+
+# Prices are stored as integer thousandths of euro, DGEG publishes 3 decimals
+PRICE_SCALE = 1000
+
+
+def _to_minutes(value: datetime) -> int:
+    """Return an aware datetime as whole minutes since the epoch."""
+    return int(value.timestamp()) // 60
+
+
+def _delta_encode(values: array) -> list[int]:
+    return [value - previous for value, previous in zip(values, [0, *values])]
+
+
+class _Series:
+    """Price changes of one fuel at one station, in two parallel arrays."""
+
+    __slots__ = ("times", "prices")
+
+    def __init__(self, times: Iterable[int] = (), prices: Iterable[int] = ()) -> None:
+        self.times = array("q", times)
+        self.prices = array("l", prices)
+
+    def append(self, time: int, price: int) -> bool:
+        """Add a row unless it repeats the last one, return True if added."""
+        if self.times:
+            if price == self.prices[-1] and time == self.times[-1]:
+                return False
+            # Keep the rows sorted even if DGEG goes back in time
+            time = max(time, self.times[-1])
+        self.times.append(time)
+        self.prices.append(price)
+        return True
+
+    def query(self, start: int, end: int) -> Dict[str, Any] | None:
+        """Return the rows and aggregates of the range [start, end].
+
+        The price in effect at start counts towards the aggregates, and the
+        average is weighted by how long each price was in effect. Times are
+        returned as seconds since the epoch.
+        """
+        first = max(bisect_right(self.times, start) - 1, 0)
+        last = bisect_right(self.times, end)
+        if first >= last:
+            return None
+        times = self.times[first:last]
+        prices = self.prices[first:last]
+
+        bounds = [max(time, start) for time in times]
+        bounds.append(max(end, bounds[-1]))
+        durations = [b - a for a, b in zip(bounds, bounds[1:])]
+        total = sum(durations)
+        if total:
+            average = sum(map(int.__mul__, prices, durations)) / total
+        else:
+            average = sum(prices) / len(prices)
+
+        inside = bisect_left(times, start)
+        return {
+            "min": min(prices) / PRICE_SCALE,
+            "avg": round(average / PRICE_SCALE, 4),
+            "max": max(prices) / PRICE_SCALE,
+            # Columns rather than rows, cheaper to build and to chart
+            "times": [time * 60 for time in times[inside:]],
+            "prices": [price / PRICE_SCALE for price in prices[inside:]],
+        }
+
+
+class PriceHistory:
+    """Price changes of every tracked station, persisted locally.
+
+    A row is only added when the price or the DataAtualizacao of a fuel
+    changes. Each series is a pair of arrays (minutes since the epoch and
+    thousandths of euro) and is delta encoded on disk, where most rows take
+    a few bytes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the history store."""
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._series: Dict[int, Dict[str, _Series]] = {}
+
+    async def async_load(self) -> None:
+        """Load the history, dropping the rows past the retention period."""
+        data = await self._store.async_load() or {}
+        oldest = _to_minutes(dt_util.utcnow() - RETENTION)
+        for station_id, fuels in data.get("stations", {}).items():
+            for fuel_type, (times, prices) in fuels.items():
+                times = list(accumulate(times))
+                prices = list(accumulate(prices))
+                # Keep the last row before the cut, it is still in effect
+                keep = max(bisect_right(times, oldest) - 1, 0)
+                self._series.setdefault(int(station_id), {})[fuel_type] = _Series(
+                    times[keep:], prices[keep:])
+        _LOGGER.debug("Loaded the price history of %s gas stations", len(self._series))
+
+    @callback
+    def async_record(self, station: Station, now: datetime) -> None:
+        """Record the fuel prices of a station that changed since last seen."""
+        series = self._series.setdefault(station.id, {})
+        changed = False
+        for fuel in station.fuels:
+            if not fuel.price:
+                continue
+            if fuel.last_update:
+                time = _to_minutes(fuel.last_update.replace(tzinfo=DGEG_TIME_ZONE))
+            else:
+                time = _to_minutes(now)
+            fuel_series = series.get(fuel.name)
+            if fuel_series is None:
+                fuel_series = series[fuel.name] = _Series()
+            price = round(fuel.price * PRICE_SCALE)
+            if fuel_series.times and fuel.last_update is None and price == fuel_series.prices[-1]:
+                # Without a timestamp only a new price is a change
+                continue
+            changed |= fuel_series.append(time, price)
+        if changed:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def query(
+        self,
+        station_ids: Iterable[int],
+        fuel_types: Iterable[str] | None,
+        start: datetime,
+        end: datetime,
+    ) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """Return the prices and min/avg/max of the stations between start and end."""
+        start_minutes, end_minutes = _to_minutes(start), _to_minutes(end)
+        fuel_types = set(fuel_types) if fuel_types else None
+        result: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for station_id in station_ids:
+            for fuel_type, series in self._series.get(station_id, {}).items():
+                if fuel_types is not None and fuel_type not in fuel_types:
+                    continue
+                rows = series.query(start_minutes, end_minutes)
+                if rows is not None:
+                    result.setdefault(station_id, {})[fuel_type] = rows
+        return result
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {
+            "stations": {
+                str(station_id): {
+                    fuel_type: [
+                        _delta_encode(fuel_series.times),
+                        _delta_encode(fuel_series.prices),
+                    ]
+                    for fuel_type, fuel_series in series.items()
+                }
+                for station_id, series in self._series.items()
+                if series
+            }
+        }
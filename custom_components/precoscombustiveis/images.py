@@ -0,0 +1,82 @@
+"""Copy the brand images to the www folder, once per integration version."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from homeassistant.core import HomeAssistant
+from homeassistant.loader import async_get_integration
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), "images")
+MANIFEST_FILENAME = ".manifest.json"
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _read_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def sync_images(source_dir: str, target_dir: str, version: str) -> list[str]:
+    """Bring target_dir up to date with source_dir, return the copied files.
+
+    A manifest of the content hashes copied is kept in target_dir. While it
+    records the running integration version and every file is in place
+    nothing else is read; after an upgrade only the images whose hash
+    changed are copied. Blocking, run it in the executor.
+    """
+    manifest_path = os.path.join(target_dir, MANIFEST_FILENAME)
+    manifest = _read_manifest(manifest_path)
+    copied_hashes: dict = manifest.get("files") or {}
+    if manifest.get("version") == version and all(
+        os.path.exists(os.path.join(target_dir, filename))
+        for filename in copied_hashes
+    ):
+        return []
+
+    os.makedirs(target_dir, exist_ok=True)
+    hashes = {}
+    copied = []
+    for filename in sorted(os.listdir(source_dir)):
+        source_file = os.path.join(source_dir, filename)
+        if not os.path.isfile(source_file):
+            continue
+        target_file = os.path.join(target_dir, filename)
+        hashes[filename] = _file_hash(source_file)
+        if copied_hashes.get(filename) != hashes[filename] or not os.path.exists(target_file):
+            shutil.copyfile(source_file, target_file)
+            copied.append(filename)
+
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump({"version": version, "files": hashes}, file)
+    return copied
+
+
+async def async_sync_images(hass: HomeAssistant) -> None:
+    """Copy new or changed brand images to www/precoscombustiveis."""
+    integration = await async_get_integration(hass, DOMAIN)
+    target_dir = hass.config.path("www", DOMAIN)
+    try:
+        copied = await hass.async_add_executor_job(
+            sync_images, SOURCE_DIR, target_dir, str(integration.version))
+    except OSError as err:
+        _LOGGER.error("Error copying images: %s", err)
+        return
+
+    if copied:
+        _LOGGER.info("Copied images: %s", ", ".join(copied))
@@ -0,0 +1,342 @@
+"""Fuel prices of every station in Portugal, from the district listings."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from functools import cached_property
+from typing import Any, Dict, Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .cache import StationListCache, async_get_station_list_cache
+from .const import DOMAIN, DATA_NATIONAL_PRICES, DISTRITOS
+from .dgeg import DGEGError
+from .helpers import outside_config_entry
+from .history import PRICE_SCALE
+
+_LOGGER = logging.getLogger(__name__)
+
+# DGEG prices change once or twice a day
+NATIONAL_UPDATE_INTERVAL = timedelta(hours=2)
+
+# District listings fetched at once, each one is a few MB
+NATIONAL_MAX_CONCURRENCY = 3
+
+
+class DistritoPrices:
+    """Prices of one district, in parallel arrays sorted by fuel and price.
+
+    The rows of a fuel are contiguous and sorted by price, so their count,
+    minimum, maximum and the rank of a price are found with slices and
+    bisects instead of scanning the district.
+    """
+
+    __slots__ = ("station_ids", "prices", "municipios", "municipio_names", "fuels")
+
+    def __init__(self, rows: list[tuple[str, int, int, int]], municipio_names: list[str]) -> None:
+        """Build the columns from (fuel type, price, station id, municipio) rows."""
+        rows.sort()
+        self.station_ids = array("i", [row[2] for row in rows])
+        self.prices = array("i", [row[1] for row in rows])
+        self.municipios = array("H", [row[3] for row in rows])
+        self.municipio_names = municipio_names
+        # Fuel type -> [first row, last row + 1)
+        self.fuels: Dict[str, tuple[int, int]] = {}
+        start = 0
+        for index in range(1, len(rows) + 1):
+            if index == len(rows) or rows[index][0] != rows[start][0]:
+                self.fuels[rows[start][0]] = (start, index)
+                start = index
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def find(self, station_id: int, fuel_type: str) -> int | None:
+        """Return the row of a station and fuel, None if not listed."""
+        bounds = self.fuels.get(fuel_type)
+        if bounds is None:
+            return None
+        try:
+            return self.station_ids.index(station_id, *bounds)
+        except ValueError:
+            return None
+
+
+def build_distrito_prices(stations: list[Dict]) -> DistritoPrices:
+    """Build the price columns of a district from its cached listing.
+
+    Only the id, municipio, fuel type and price of each station are kept.
+    Blocking for large districts, run it in the executor.
+    """
+    rows: list[tuple[str, int, int, int]] = []
+    municipios: Dict[str, int] = {}
+    for station in stations:
+        fuels = station.get("Combustiveis")
+        if not fuels or station.get("Id") is None:
+            continue
+        municipio = municipios.setdefault(station.get("Municipio") or "", len(municipios))
+        for fuel_type, (price, _) in fuels.items():
+            rows.append((fuel_type, round(price * PRICE_SCALE), int(station["Id"]), municipio))
+    return DistritoPrices(rows, list(municipios))
+
+
+class MunicipioPrices:
+    """Sorted prices of every fuel in every municipio, for rank queries.
+
+    Built in one pass over a PriceTable: the rows of a fuel are already
+    sorted by price, so the prices of each municipio come out sorted too.
+    """
+
+    def __init__(self, table: PriceTable) -> None:
+        """Index the prices of a table per fuel and municipio."""
+        # (fuel type, distrito id, municipio) -> sorted prices
+        self._prices: Dict[tuple[str, int, int], array] = {}
+        # Station id -> (distrito id, municipio)
+        self._stations: Dict[int, tuple[int, int]] = {}
+        self._names: Dict[tuple[int, int], str] = {}
+        for distrito_id, prices in table.distritos.items():
+            for index, name in enumerate(prices.municipio_names):
+                self._names[distrito_id, index] = name
+            for fuel_type, (start, end) in prices.fuels.items():
+                for row in range(start, end):
+                    municipio = prices.municipios[row]
+                    peers = self._prices.get((fuel_type, distrito_id, municipio))
+                    if peers is None:
+                        peers = self._prices[fuel_type, distrito_id, municipio] = array("i")
+                    peers.append(prices.prices[row])
+                    self._stations[prices.station_ids[row]] = (distrito_id, municipio)
+
+    def rank(self, station_id: int, fuel_type: str, price: float) -> Dict[str, Any] | None:
+        """Return where a price ranks among the stations of a station's municipio.
+
+        The rank starts at 1 for the cheapest price, the percentile is the
+        share of the other stations cheaper, and the median delta is the
+        price minus the municipio median.
+        """
+        municipio = self._stations.get(station_id)
+        peers = self._prices.get((fuel_type, *municipio)) if municipio else None
+        if not peers or not price:
+            return None
+        value = round(price * PRICE_SCALE)
+        cheaper = bisect_left(peers, value)
+        count = len(peers)
+        median = (peers[(count - 1) // 2] + peers[count // 2]) / 2
+        return {
+            "municipio": self._names[municipio],
+            "rank": cheaper + 1,
+            "count": count,
+            "percentile": round(100 * cheaper / max(count - 1, 1), 1),
+            "median_delta": round((value - median) / PRICE_SCALE, 3),
+        }
+
+
+class PriceTable:
+    """Station × fuel prices of every district.
+
+    A refresh builds a new table that reuses the districts DGEG reported as
+    not modified, so consumers can compare tables by identity.
+    """
+
+    def __init__(self, distritos: Dict[int, DistritoPrices]) -> None:
+        """Initialize the table from the prices of each district."""
+        self.distritos = distritos
+
+    def __len__(self) -> int:
+        return sum(len(prices) for prices in self.distritos.values())
+
+    def locate(self, station_id: int, fuel_type: str) -> tuple[int, int] | None:
+        """Return the district and row of a station and fuel."""
+        for distrito_id, prices in self.distritos.items():
+            row = prices.find(station_id, fuel_type)
+            if row is not None:
+                return distrito_id, row
+        return None
+
+    def _slices(self, fuel_type: str, distrito_id: int | None):
+        distritos = (
+            self.distritos.items() if distrito_id is None
+            else [(distrito_id, self.distritos[distrito_id])]
+            if distrito_id in self.distritos else []
+        )
+        for distrito_id, prices in distritos:
+            bounds = prices.fuels.get(fuel_type)
+            if bounds is not None:
+                yield distrito_id, prices, bounds
+
+    def aggregate(self, fuel_type: str, distrito_id: int | None = None) -> Dict[str, Any] | None:
+        """Return the count, min, average and max price of a fuel.
+
+        Over one district, or the whole country without distrito_id. The
+        cheapest entry is (distrito id, row) of the lowest price.
+        """
+        count = total = 0
+        low = high = cheapest = None
+        for distrito_id, prices, (start, end) in self._slices(fuel_type, distrito_id):
+            count += end - start
+            total += sum(prices.prices[start:end])
+            if low is None or prices.prices[start] < low:
+                low, cheapest = prices.prices[start], (distrito_id, start)
+            if high is None or prices.prices[end - 1] > high:
+                high = prices.prices[end - 1]
+        if not count:
+            return None
+        return {
+            "count": count,
+            "min": low / PRICE_SCALE,
+            "avg": round(total / count / PRICE_SCALE, 3),
+            "max": high / PRICE_SCALE,
+            "cheapest": cheapest,
+        }
+
+    def percentile(
+        self, station_id: int, fuel_type: str, distrito_id: int | None = None
+    ) -> float | None:
+        """Return the share of the other stations cheaper than a station, in %.
+
+        0 is the cheapest station and 100 the most expensive one, over one
+        district or the whole country without distrito_id.
+        """
+        located = self.locate(station_id, fuel_type)
+        if located is None:
+            return None
+        price = self.distritos[located[0]].prices[located[1]]
+        count = cheaper = 0
+        for _, prices, (start, end) in self._slices(fuel_type, distrito_id):
+            count += end - start
+            cheaper += bisect_left(prices.prices, price, start, end) - start
+        return round(100 * cheaper / max(count - 1, 1), 1)
+
+    @cached_property
+    def municipios(self) -> MunicipioPrices:
+        """Return the per-municipio index, built on first use."""
+        return MunicipioPrices(self)
+
+
+class NationalPricesCoordinator(DataUpdateCoordinator[PriceTable]):
+    """Builds a PriceTable from the district listings the entries need.
+
+    The listings already carry the price of every station and fuel, so no
+    station details are requested. They come from the StationListCache
+    shared with the config flows, the searches and the station refreshes,
+    which revalidates them with their ETag/Last-Modified validators. The
+    distrito and national sensors need every district, a municipio rank
+    only the district of its station. A district whose listing did not
+    change keeps its prices, one that could not be fetched its previous
+    prices. Like any coordinator it only polls while some entity listens.
+    """
+
+    def __init__(self, hass: HomeAssistant, cache: StationListCache) -> None:
+        """Initialize the coordinator."""
+        self._cache = cache
+        # Entry id -> districts it needs, None for every district
+        self._demand: Dict[str, frozenset[int] | None] = {}
+        # District id -> (listing, prices built from it)
+        self._built: Dict[int, tuple[list[Dict], DistritoPrices]] = {}
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} national prices",
+            update_interval=NATIONAL_UPDATE_INTERVAL,
+        )
+
+    @property
+    def distrito_ids(self) -> list[int]:
+        """Return the ids of the districts some entry needs."""
+        if any(distritos is None for distritos in self._demand.values()):
+            return list(DISTRITOS)
+        return sorted(set().union(*self._demand.values()))
+
+    @callback
+    def async_set_distritos(self, key: str, distrito_ids: Iterable[int] | None) -> None:
+        """Set the districts an entry needs, None for every district.
+
+        An empty set releases the entry. Districts missing from the current
+        table are fetched right away instead of at the next refresh.
+        """
+        distritos = None if distrito_ids is None else frozenset(distrito_ids)
+        if distritos is None or distritos:
+            self._demand[key] = distritos
+        else:
+            self._demand.pop(key, None)
+
+        required = self.distrito_ids
+        if required and (
+            self.data is None or not self.data.distritos.keys() >= set(required)
+        ):
+            self.hass.async_create_background_task(
+                self.async_request_refresh(), f"{DOMAIN} national prices")
+
+    async def _async_build(self, distrito_id: int) -> DistritoPrices | None:
+        """Return the prices of a district, rebuilt only if its listing changed."""
+        stations = await self._cache.async_get_recent(distrito_id, NATIONAL_UPDATE_INTERVAL)
+        if not stations:
+            return None
+        built = self._built.get(distrito_id)
+        if built is None or built[0] is not stations:
+            prices = await self.hass.async_add_executor_job(build_distrito_prices, stations)
+            built = self._built[distrito_id] = (stations, prices)
+        return built[1]
+
+    async def _async_update_data(self) -> PriceTable:
+        """Build the prices of the districts needed from their listings."""
+        previous = self.data.distritos if self.data else {}
+        distrito_ids = self.distrito_ids
+        if not distrito_ids:
+            # The districts of the ranked stations are not known yet
+            self._built.clear()
+            return PriceTable({})
+        semaphore = asyncio.Semaphore(NATIONAL_MAX_CONCURRENCY)
+
+        async def _fetch(distrito_id: int) -> DistritoPrices | None:
+            async with semaphore:
+                return await self._async_build(distrito_id)
+
+        results = await asyncio.gather(
+            *(_fetch(distrito_id) for distrito_id in distrito_ids),
+            return_exceptions=True)
+
+        distritos: Dict[int, DistritoPrices] = {}
+        errors: list[DGEGError] = []
+        for distrito_id, result in zip(distrito_ids, results):
+            if isinstance(result, DGEGError):
+                errors.append(result)
+                result = None
+            elif isinstance(result, BaseException):
+                raise result
+            # Failed or empty: keep the previous prices
+            if not result and distrito_id in previous:
+                result = previous[distrito_id]
+            if result:
+                distritos[distrito_id] = result
+        # Forget the listings of the districts no longer needed
+        for distrito_id in self._built.keys() - distritos.keys():
+            del self._built[distrito_id]
+
+        if not distritos:
+            raise UpdateFailed(
+                f"Error communicating with DGEG API: {errors[0] if errors else 'no prices'}")
+        if errors:
+            _LOGGER.warning(
+                "Keeping the previous prices of %s districts that could not be fetched: %s",
+                len(errors), errors[0])
+        if self.data is not None and distritos == previous:
+            # Nothing changed, the sensors skip the same table
+            return self.data
+        return PriceTable(distritos)
+
+
+@callback
+def async_get_national_prices(hass: HomeAssistant) -> NationalPricesCoordinator:
+    """Return the national prices coordinator shared by every entry."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    coordinator = domain_data.get(DATA_NATIONAL_PRICES)
+    if coordinator is None:
+        # Created by the first entry enabling the option, kept after it unloads
+        with outside_config_entry():
+            coordinator = domain_data[DATA_NATIONAL_PRICES] = NationalPricesCoordinator(
+                hass, async_get_station_list_cache(hass))
+    return coordinator
@@ -0,0 +1,56 @@
+"""Sorted index of the fuel prices of the tracked stations."""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable
+
+from .dgeg import Station
+
+
+class PriceIndex:
+    """Prices of every tracked station, kept sorted per fuel type.
+
+    The index is updated one station at a time as new data arrives, only
+    touching the fuels whose price changed, so the cheapest station of a set
+    is found without scanning every sensor.
+    """
+
+    def __init__(self) -> None:
+        self._prices: Dict[int, Dict[str, float]] = {}
+        self._sorted: Dict[str, list[tuple[float, int]]] = {}
+
+    def update(self, station: Station) -> None:
+        """Index the current prices of a station."""
+        fuels = {fuel.name: fuel.price for fuel in station.fuels if fuel.price}
+        indexed = self._prices.setdefault(station.id, {})
+        for fuel_type in [fuel_type for fuel_type in indexed if fuel_type not in fuels]:
+            self._discard(station.id, fuel_type, indexed.pop(fuel_type))
+        for fuel_type, price in fuels.items():
+            previous = indexed.get(fuel_type)
+            if previous != price:
+                if previous is not None:
+                    self._discard(station.id, fuel_type, previous)
+                indexed[fuel_type] = price
+                insort(self._sorted.setdefault(fuel_type, []), (price, station.id))
+
+    def remove(self, station_id: int) -> None:
+        """Drop every price of a station."""
+        for fuel_type, price in self._prices.pop(station_id, {}).items():
+            self._discard(station_id, fuel_type, price)
+
+    def _discard(self, station_id: int, fuel_type: str, price: float) -> None:
+        prices = self._sorted[fuel_type]
+        del prices[bisect_left(prices, (price, station_id))]
+
+    def cheapest(
+        self, fuel_type: str, station_ids: Iterable[int] | None = None
+    ) -> tuple[float, int] | None:
+        """Return the lowest (price, station id) of a fuel, among a set of stations."""
+        prices = self._sorted.get(fuel_type)
+        if not prices:
+            return None
+        if station_ids is None:
+            return prices[0]
+        station_ids = set(station_ids)
+        return next(
+            (item for item in prices if item[1] in station_ids), None)
@@ -0,0 +1,97 @@
+"""Adaptive polling schedule learnt from the station DataAtualizacao history."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import DEFAULT_MAX_INTERVAL_MINUTES, DEFAULT_MIN_INTERVAL_MINUTES
+from .dgeg import Station
+
+DEFAULT_MIN_INTERVAL = timedelta(minutes=DEFAULT_MIN_INTERVAL_MINUTES)
+DEFAULT_MAX_INTERVAL = timedelta(minutes=DEFAULT_MAX_INTERVAL_MINUTES)
+
+# DGEG timestamps are local time in mainland Portugal
+DGEG_TIME_ZONE = dt_util.get_time_zone("Europe/Lisbon")
+
+# An hour of the day is a posting window once it holds this share of the
+# observed price changes (and at least two of them)
+WINDOW_MIN_SHARE = 0.15
+WINDOW_MIN_COUNT = 2
+
+
+class AdaptiveSchedule:
+    """When to poll one station next.
+
+    Every new DataAtualizacao seen for the station is counted in a histogram
+    by hour of day. During the hours that usually carry price changes the
+    station is polled at the minimum interval; outside them the interval
+    doubles after every poll without changes, up to the maximum, but never
+    past the start of the next posting window.
+    """
+
+    __slots__ = (
+        "min_interval", "max_interval", "_histogram", "_seen",
+        "_backoff", "next_poll",
+    )
+
+    def __init__(self, min_interval: timedelta = DEFAULT_MIN_INTERVAL,
+                 max_interval: timedelta = DEFAULT_MAX_INTERVAL) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self._histogram = [0] * 24
+        self._seen: set[datetime] = set()
+        self._backoff = min_interval
+        self.next_poll: datetime = dt_util.utcnow()
+
+    def set_bounds(self, min_interval: timedelta, max_interval: timedelta,
+                   now: datetime) -> None:
+        """Change the polling bounds, bringing the next poll within them."""
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self._backoff = min(max(self._backoff, self.min_interval), self.max_interval)
+        self.next_poll = min(self.next_poll, now + self.max_interval)
+
+    def is_due(self, now: datetime) -> bool:
+        """Return True if the station should be polled at now."""
+        return self.next_poll <= now
+
+    def record(self, station: Station, now: datetime) -> None:
+        """Learn from a fetched station and schedule the next poll."""
+        updates = {
+            fuel.last_update for fuel in station.fuels if fuel.last_update
+        } - self._seen
+        # The first fetch only seeds the histogram, it is not a change
+        changed = bool(updates) and bool(self._seen)
+        for last_update in updates:
+            self._histogram[last_update.hour] += 1
+        self._seen = {fuel.last_update for fuel in station.fuels if fuel.last_update}
+
+        if changed:
+            self._backoff = self.min_interval
+        else:
+            self._backoff = min(self._backoff * 2, self.max_interval)
+
+        self.next_poll = now + self._next_interval(now)
+
+    def _windows(self) -> list[int]:
+        """Return the hours of the day in which prices are usually posted."""
+        total = sum(self._histogram)
+        threshold = max(WINDOW_MIN_COUNT, total * WINDOW_MIN_SHARE)
+        return [hour for hour, count in enumerate(self._histogram) if count >= threshold]
+
+    def _next_interval(self, now: datetime) -> timedelta:
+        local = now.astimezone(DGEG_TIME_ZONE)
+        windows = self._windows()
+        if local.hour in windows:
+            return self.min_interval
+
+        interval = self._backoff
+        if windows:
+            # Wake up at the start of the next posting window
+            start = local.replace(minute=0, second=0, microsecond=0)
+            for hours in range(1, 25):
+                if (local.hour + hours) % 24 in windows:
+                    interval = min(interval, start + timedelta(hours=hours) - local)
+                    break
+        return max(interval, self.min_interval)
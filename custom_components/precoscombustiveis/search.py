@@ -0,0 +1,71 @@
+"""Search the cheapest stations around a point."""
+from __future__ import annotations
+
+import heapq
+from datetime import datetime
+from typing import Dict, NamedTuple
+
+from homeassistant.core import HomeAssistant
+
+from .cache import async_get_station_list_cache
+from .dgeg import parse_datetime
+
+
+class CheapStation(NamedTuple):
+    """A station selling a fuel near a point."""
+
+    station_id: int
+    distrito_id: int
+    name: str
+    brand: str
+    price: float
+    last_update: datetime | None
+    distance: float
+    listing: Dict
+
+    def as_dict(self) -> Dict:
+        """Return the result as a service response item."""
+        return {
+            "station_id": self.station_id,
+            "name": self.name,
+            "brand": self.brand,
+            "price": self.price,
+            "last_update": self.last_update.isoformat() if self.last_update else None,
+            "distance": round(self.distance, 2),
+        }
+
+
+async def async_find_cheapest_stations(
+    hass: HomeAssistant,
+    latitude: float,
+    longitude: float,
+    radius: float,
+    fuel_type: str,
+    count: int,
+) -> list[CheapStation]:
+    """Return the cheapest stations selling a fuel within radius km of a point.
+
+    Every station within the radius is ranked on the prices of the cached
+    district listings, so a search issues no request while they are fresh.
+    """
+    grid = await async_get_station_list_cache(hass).async_get_grid()
+    found = []
+    for candidate in grid.nearby(latitude, longitude, radius):
+        fuel = (candidate.station.get("Combustiveis") or {}).get(fuel_type)
+        if fuel:
+            found.append((fuel[0], candidate.distance, candidate, fuel[1]))
+
+    return [
+        CheapStation(
+            int(candidate.station["Id"]),
+            candidate.distrito_id,
+            candidate.station.get("Nome"),
+            candidate.station.get("Marca"),
+            price,
+            parse_datetime(last_update),
+            distance,
+            candidate.station,
+        )
+        for price, distance, candidate, last_update in heapq.nsmallest(
+            count, found, key=lambda item: (item[0], item[1]))
+    ]
@@ -3,11 +3,16 @@ from __future__ import annotations
 
 import logging
 import unicodedata
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict
 
 
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -18,51 +23,210 @@ from .const import (
     UNIT_OF_MEASUREMENT,
     ATTRIBUTION,
     CONF_STATIONID,
-    CONF_FUEL_TYPES)
+    CONF_FUEL_TYPE,
+    CONF_FUEL_TYPES,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_NATIONAL_PRICES,
+    CONF_MUNICIPIO_RANK,
+    CONF_DISTRITO_ID,
+    CONF_ENTRY_TYPE,
+    DATA_NATIONAL_PRICES,
+    DISTRITOS,
+    ENTRY_TYPE_CHEAPEST,
+    SIGNAL_ENTRY_UPDATED)
 from .coordinator import PrecosCombustiveisCoordinator
 from .dgeg import Station
+from .helpers import async_import_module, get_entry_station_ids
+
+if TYPE_CHECKING:
+    from .national import NationalPricesCoordinator
 
 logger = logging.getLogger(__name__)
 logger.level = logging.INFO
 
+# Station details that do not change between updates, kept out of the
+# recorder and, in compact mode, out of the state altogether
+STATIC_ATTRIBUTES = frozenset({
+    "GasStationId",
+    "Brand",
+    "Name",
+    "Address",
+    "Latitude",
+    "Longitude",
+    "StationType",
+    "StationsCount",
+    "Municipio",
+})
+
+# Sensors derived from the national prices: name suffix and icon
+NATIONAL_SENSORS = {
+    "distrito_average": ("distrito average", "mdi:scale-balance"),
+    "distrito_cheapest": ("distrito cheapest", "mdi:cash-minus"),
+}
+
+# Diagnostic sensors of a station: name suffix, device class, state class and icon
+DIAGNOSTIC_SENSORS = {
+    "last_fetch": ("DGEG last fetch", SensorDeviceClass.TIMESTAMP,
+                   None, "mdi:cloud-download-outline"),
+    "failed_fetches": ("DGEG failed fetches", None,
+                       SensorStateClass.TOTAL_INCREASING, "mdi:alert-circle-outline"),
+}
+
 
 async def async_setup_entry(hass: HomeAssistant,
                             config_entry: ConfigEntry,
                             async_add_entities: AddEntitiesCallback):
     """Setup sensor platform."""
     coordinator: PrecosCombustiveisCoordinator = hass.data[DOMAIN][config_entry.entry_id]
-    station = coordinator.data
 
-    # Get selected fuel types from config (with fallback for backward compatibility)
-    selected_fuel_types = config_entry.data.get(
-        CONF_FUEL_TYPES,
-        [fuel["TipoCombustivel"] for fuel in station.fuels]
-    )
+    if config_entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_CHEAPEST:
+        async_add_entities([
+            PrecosCombustiveisCheapestSensor(
+                coordinator,
+                config_entry.entry_id,
+                config_entry.data[CONF_FUEL_TYPE],
+                get_entry_station_ids(config_entry)),
+        ])
+        return
+
+    station_id = int(config_entry.data[CONF_STATIONID])
+    async_add_entities([
+        PrecosCombustiveisDiagnosticSensor(coordinator, station_id, key)
+        for key in DIAGNOSTIC_SENSORS
+    ])
+    sensors: dict[str, PrecosCombustiveisSensor] = {}
+    national_sensors: dict[tuple[str, str], PrecosCombustiveisNationalSensor] = {}
+
+    @callback
+    def _async_remove_sensor(sensor: SensorEntity) -> None:
+        if sensor.registry_entry is not None:
+            er.async_get(hass).async_remove(sensor.entity_id)
+        else:
+            hass.async_create_task(sensor.async_remove())
+
+    @callback
+    def _async_release_national_prices() -> None:
+        national = hass.data[DOMAIN].get(DATA_NATIONAL_PRICES)
+        if national is not None:
+            national.async_set_distritos(config_entry.entry_id, ())
+
+    async def _async_sync_sensors() -> None:
+        """Create the selected fuel sensors missing and remove the others."""
+        station = coordinator.data[station_id]
+        # Get selected fuel types from config (with fallback for backward compatibility)
+        selected_fuel_types = config_entry.data.get(
+            CONF_FUEL_TYPES,
+            station.fuel_types
+        )
+        compact_attributes = config_entry.options.get(CONF_COMPACT_ATTRIBUTES, False)
+        national_prices = config_entry.options.get(CONF_NATIONAL_PRICES, False)
+        municipio_rank = config_entry.options.get(CONF_MUNICIPIO_RANK, False)
+        national = None
+        if national_prices or municipio_rank:
+            # Only loaded, and only polling, once an entry opts in
+            national_module = await async_import_module(hass, "national")
+            national = national_module.async_get_national_prices(hass)
+            # The ranks only need the district of the station, once known
+            distrito_id = config_entry.data.get(CONF_DISTRITO_ID)
+            national.async_set_distritos(
+                config_entry.entry_id,
+                None if national_prices else [distrito_id] if distrito_id else [])
+        else:
+            _async_release_national_prices()
+        peers = national if municipio_rank else None
+
+        for fuel_type in [fuel_type for fuel_type in sensors if fuel_type not in selected_fuel_types]:
+            _async_remove_sensor(sensors.pop(fuel_type))
+        for key in [key for key in national_sensors
+                    if not national_prices or key[1] not in selected_fuel_types]:
+            _async_remove_sensor(national_sensors.pop(key))
+
+        for sensor in sensors.values():
+            sensor.async_set_compact_attributes(compact_attributes)
+            sensor.async_set_peer_prices(peers)
+
+        new_sensors = [
+            PrecosCombustiveisSensor(
+                coordinator,
+                station_id,
+                fuel_type,
+                compact_attributes,
+                peers)
+            for fuel_type in station.fuel_types
+            if fuel_type in selected_fuel_types and fuel_type not in sensors
+        ]
+        sensors.update((sensor.fuel_name, sensor) for sensor in new_sensors)
+        async_add_entities(new_sensors)
+
+        if not national_prices:
+            return
+        new_national_sensors = {
+            (kind, fuel_type): PrecosCombustiveisNationalSensor(
+                national, station, fuel_type, kind)
+            for fuel_type in station.fuel_types
+            if fuel_type in selected_fuel_types
+            for kind in NATIONAL_SENSORS
+            if (kind, fuel_type) not in national_sensors
+        }
+        national_sensors.update(new_national_sensors)
+        async_add_entities(list(new_national_sensors.values()))
+
+    await _async_sync_sensors()
+    config_entry.async_on_unload(_async_release_national_prices)
+    # Option changes add and remove sensors in place, see async_update_entry
+    config_entry.async_on_unload(async_dispatcher_connect(
+        hass, SIGNAL_ENTRY_UPDATED.format(config_entry.entry_id), _async_sync_sensors))
+
+
+def _get_entity_picture(station: Station) -> str | None:
+    brand = station.brand
+    if brand and brand.lower() != "genérico":
+        normalized_brand = unicodedata.normalize("NFD", brand.lower())
+        brand_name = "".join(c for c in normalized_brand if c.isalpha())
+        return f"/local/precoscombustiveis/{brand_name}.png"
+    return None
+
+
+class _ChangeDetectionMixin:
+    """Skip state writes when neither the state nor the availability changed."""
+
+    coordinator: PrecosCombustiveisCoordinator
+    _written_state: tuple | None
+    _written_available: bool = True
 
-    sensors = [
-        PrecosCombustiveisSensor(coordinator, config_entry.data[CONF_STATIONID], fuel["TipoCombustivel"])
-        for fuel in station.fuels
-        if fuel["TipoCombustivel"] in selected_fuel_types
-    ]
-    async_add_entities(sensors)
+    def _skip_write(self, state: tuple) -> bool:
+        """Return True, counting the skipped write, if state is already written."""
+        available = self.available  # type: ignore[attr-defined]
+        if state == self._written_state and available == self._written_available:
+            self.coordinator.skipped_writes += 1
+            return True
+        self._written_available = available
+        return False
 
 
-class PrecosCombustiveisSensor(CoordinatorEntity[PrecosCombustiveisCoordinator], SensorEntity):  # type: ignore[misc]
+class PrecosCombustiveisSensor(_ChangeDetectionMixin, CoordinatorEntity[PrecosCombustiveisCoordinator], SensorEntity):  # type: ignore[misc]
     """Representation of a PrecosCombustiveis Sensor."""
 
-    def __init__(self, coordinator: PrecosCombustiveisCoordinator, station_id: int, fuel_name: str):
+    _unrecorded_attributes = STATIC_ATTRIBUTES
+
+    def __init__(self, coordinator: PrecosCombustiveisCoordinator, station_id: int, fuel_name: str,
+                 compact_attributes: bool = False,
+                 peers: NationalPricesCoordinator | None = None):
         super().__init__(coordinator)
         self._station_id = station_id
         self._fuel_name = fuel_name
+        self._compact_attributes = compact_attributes
+        self._peers = peers
+        self._unsub_peers: Callable[[], None] | None = None
 
-        station = coordinator.data
+        station = coordinator.data[station_id]
         self._attr_unique_id = f"{DOMAIN}-{self._station_id}-{self._fuel_name}".lower()
         self._attr_name = f"{station.brand} {station.name} {self._fuel_name}"
         self._attr_icon = DEFAULT_ICON
         self._attr_native_unit_of_measurement = UNIT_OF_MEASUREMENT
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_attribution = ATTRIBUTION
-        self._attr_entity_picture = self._get_entity_picture(station)
+        self._attr_entity_picture = _get_entity_picture(station)
 
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, str(self._station_id))},
@@ -72,33 +236,305 @@ class PrecosCombustiveisSensor(CoordinatorEntity[PrecosCombustiveisCoordinator],
         )
 
         # Set initial dynamic attribute values
+        self._written_state: tuple | None = None
         self._update_from_station(station)
 
-    def _get_entity_picture(self, station: Station) -> str | None:
-        brand = station.brand
-        if brand and brand.lower() != "genérico":
-            normalized_brand = unicodedata.normalize("NFD", brand.lower())
-            brand_name = "".join(c for c in normalized_brand if c.isalpha())
-            return f"/local/precoscombustiveis/{brand_name}.png"
-        return None
+    @property
+    def fuel_name(self) -> str:
+        """Return the fuel type of the sensor."""
+        return self._fuel_name
+
+    @callback
+    def async_set_compact_attributes(self, compact_attributes: bool) -> None:
+        """Switch between the full and the compact state attributes."""
+        if compact_attributes == self._compact_attributes:
+            return
+        self._compact_attributes = compact_attributes
+        station = self.coordinator.data.get(self._station_id)
+        if station is not None:
+            self._update_from_station(station)
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Also listen to the municipio prices, when ranking."""
+        await super().async_added_to_hass()
+        self._async_listen_peers()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop listening to the municipio prices."""
+        await super().async_will_remove_from_hass()
+        if self._unsub_peers is not None:
+            self._unsub_peers()
+            self._unsub_peers = None
+
+    @callback
+    def _async_listen_peers(self) -> None:
+        if self._peers is not None and self._unsub_peers is None:
+            self._unsub_peers = self._peers.async_add_listener(
+                self._handle_coordinator_update)
+
+    @callback
+    def async_set_peer_prices(self, peers: NationalPricesCoordinator | None) -> None:
+        """Start or stop ranking the station against its municipio."""
+        if peers is self._peers:
+            return
+        if self._unsub_peers is not None:
+            self._unsub_peers()
+            self._unsub_peers = None
+        self._peers = peers
+        if self.hass is not None:
+            self._async_listen_peers()
+            self._handle_coordinator_update()
+
+    def _municipio_rank(self, price: float) -> Dict[str, Any] | None:
+        """Return where the price ranks among the stations of the municipio."""
+        if self._peers is None or self._peers.data is None:
+            return None
+        return self._peers.data.municipios.rank(self._station_id, self._fuel_name, price)
 
     def _update_from_station(self, station: Station) -> None:
         """Update dynamic attributes from station data."""
         self._attr_native_value = station.get_price(self._fuel_name)
+        rank = self._municipio_rank(self._attr_native_value)
+        self._written_state = (
+            self._attr_native_value,
+            station.get_last_update(self._fuel_name),
+            rank,
+        )
+        if self._compact_attributes:
+            # Static details are left to the device
+            self._attr_extra_state_attributes = {
+                "FuelName": self._fuel_name,
+                "LastPriceUpdate": self._written_state[1],
+            }
+        else:
+            self._attr_extra_state_attributes = {
+                "GasStationId": str(self._station_id),
+                "Brand": station.brand,
+                "Name": station.name,
+                "Address": station.address,
+                "Latitude": station.latitude,
+                "Longitude": station.longitude,
+                "StationType": station.type,
+                "FuelName": self._fuel_name,
+                "LastPriceUpdate": station.get_last_update(self._fuel_name),
+            }
+        if rank is not None:
+            self._attr_extra_state_attributes.update({
+                "Municipio": rank["municipio"],
+                "MunicipioRank": rank["rank"],
+                "MunicipioStationsCount": rank["count"],
+                "MunicipioPercentile": rank["percentile"],
+                "MunicipioMedianDelta": rank["median_delta"],
+            })
+
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator or the municipio prices."""
+        station = self.coordinator.data.get(self._station_id)
+        if station is None:
+            return
+
+        # DGEG prices change a few times a day at most, only write real changes
+        price = station.get_price(self._fuel_name)
+        if self._skip_write((
+            price,
+            station.get_last_update(self._fuel_name),
+            self._municipio_rank(price),
+        )):
+            return
+
+        self._update_from_station(station)
+        self.async_write_ha_state()
+
+
+class PrecosCombustiveisCheapestSensor(_ChangeDetectionMixin, CoordinatorEntity[PrecosCombustiveisCoordinator], SensorEntity):  # type: ignore[misc]
+    """Lowest price of a fuel among a set of stations."""
+
+    _unrecorded_attributes = STATIC_ATTRIBUTES - {"GasStationId", "Brand", "Name"}
+
+    def __init__(self, coordinator: PrecosCombustiveisCoordinator, entry_id: str,
+                 fuel_name: str, station_ids: list[int]):
+        super().__init__(coordinator)
+        self._fuel_name = fuel_name
+        self._station_ids = station_ids
+
+        self._attr_unique_id = f"{DOMAIN}-cheapest-{entry_id}".lower()
+        self._attr_name = f"Cheapest {self._fuel_name}"
+        self._attr_icon = DEFAULT_ICON
+        self._attr_native_unit_of_measurement = UNIT_OF_MEASUREMENT
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_attribution = ATTRIBUTION
+
+        self._written_state: tuple | None = None
+        self._update_from_index()
+
+    def _cheapest(self) -> tuple[tuple[float, int] | None, Station | None]:
+        """Return the cheapest price index entry and its station."""
+        cheapest = self.coordinator.price_index.cheapest(
+            self._fuel_name, self._station_ids)
+        station = self.coordinator.data.get(cheapest[1]) if cheapest else None
+        return cheapest, station
+
+    def _update_from_index(self) -> None:
+        """Update attributes from the cheapest station in the price index."""
+        cheapest, station = self._cheapest()
+        self._written_state = (
+            cheapest,
+            station.get_last_update(self._fuel_name) if station else None,
+        )
+        if station is None:
+            self._attr_native_value = None
+            self._attr_entity_picture = None
+            self._attr_extra_state_attributes = {
+                "FuelName": self._fuel_name,
+                "StationsCount": len(self._station_ids),
+            }
+            return
+
+        self._attr_native_value = cheapest[0]
+        self._attr_entity_picture = _get_entity_picture(station)
         self._attr_extra_state_attributes = {
-            "GasStationId": self._station_id,
+            "GasStationId": str(station.id),
             "Brand": station.brand,
             "Name": station.name,
             "Address": station.address,
             "Latitude": station.latitude,
             "Longitude": station.longitude,
-            "StationType": station.type,
             "FuelName": self._fuel_name,
             "LastPriceUpdate": station.get_last_update(self._fuel_name),
+            "StationsCount": len(self._station_ids),
         }
 
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self._update_from_station(self.coordinator.data)
+        cheapest, station = self._cheapest()
+        if self._skip_write((
+            cheapest,
+            station.get_last_update(self._fuel_name) if station else None,
+        )):
+            return
+
+        self._update_from_index()
         self.async_write_ha_state()
 
+
+class PrecosCombustiveisDiagnosticSensor(CoordinatorEntity[PrecosCombustiveisCoordinator], SensorEntity):  # type: ignore[misc]
+    """When a station was last fetched, or how many of its fetches failed.
+
+    Disabled by default: while disabled the entity is not added, so it does
+    not listen to the coordinator and costs nothing. The metrics shared by
+    every entry are in the config entry diagnostics.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: PrecosCombustiveisCoordinator, station_id: int, key: str):
+        super().__init__(coordinator)
+        self._station_id = station_id
+        self._key = key
+
+        name, device_class, state_class, icon = DIAGNOSTIC_SENSORS[key]
+        station = coordinator.data[station_id]
+        self._attr_unique_id = f"{DOMAIN}-{station_id}-{key}".lower()
+        self._attr_name = f"{station.brand} {station.name} {name}"
+        self._attr_icon = icon
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, str(station_id))})
+
+    @property
+    def native_value(self) -> datetime | int | None:
+        """Return the last fetch time or the failed fetches count."""
+        stats = self.coordinator.station_stats.get(self._station_id)
+        if self._key == "last_fetch":
+            return stats.last_fetch if stats else None
+        return stats.failures if stats else 0
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Return where the station was fetched from, or the last error."""
+        stats = self.coordinator.station_stats.get(self._station_id)
+        if self._key == "last_fetch":
+            next_poll = self.coordinator.get_next_poll(self._station_id)
+            return {
+                "Source": stats.source if stats else None,
+                "NextPoll": next_poll.isoformat() if next_poll else None,
+            }
+        return {"LastError": stats.last_error if stats else None}
+
+
+class PrecosCombustiveisNationalSensor(CoordinatorEntity["NationalPricesCoordinator"], SensorEntity):  # type: ignore[misc]
+    """Average or cheapest price of a fuel in the district of a station."""
+
+    def __init__(self, coordinator: NationalPricesCoordinator, station: Station,
+                 fuel_name: str, kind: str):
+        super().__init__(coordinator)
+        self._station_id = station.id
+        self._fuel_name = fuel_name
+        self._kind = kind
+
+        name, icon = NATIONAL_SENSORS[kind]
+        self._attr_unique_id = f"{DOMAIN}-{station.id}-{fuel_name}-{kind}".lower()
+        self._attr_name = f"{station.brand} {station.name} {fuel_name} {name}"
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = UNIT_OF_MEASUREMENT
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_attribution = ATTRIBUTION
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, str(station.id))})
+
+        self._table = None
+        self._update_from_table()
+
+    @property
+    def available(self) -> bool:
+        """Return True once the district of the station is known."""
+        return super().available and self._attr_native_value is not None
+
+    def _update_from_table(self) -> None:
+        """Update the value and attributes from the national price table."""
+        table = self._table = self.coordinator.data
+        located = table.locate(self._station_id, self._fuel_name) if table else None
+        distrito = table.aggregate(self._fuel_name, located[0]) if located else None
+        if distrito is None:
+            self._attr_native_value = None
+            self._attr_extra_state_attributes = {"FuelName": self._fuel_name}
+            return
+
+        distrito_id = located[0]
+        national = table.aggregate(self._fuel_name)
+        attributes = {
+            "Distrito": DISTRITOS.get(distrito_id),
+            "FuelName": self._fuel_name,
+            "StationsCount": distrito["count"],
+        }
+        if self._kind == "distrito_cheapest":
+            self._attr_native_value = distrito["min"]
+            prices = table.distritos[distrito_id]
+            row = distrito["cheapest"][1]
+            attributes.update({
+                "GasStationId": str(prices.station_ids[row]),
+                "Municipio": prices.municipio_names[prices.municipios[row]],
+                "NationalMin": national["min"],
+            })
+        else:
+            self._attr_native_value = distrito["avg"]
+            attributes.update({
+                "Min": distrito["min"],
+                "Max": distrito["max"],
+                "NationalAverage": national["avg"],
+                "StationPercentile": table.percentile(
+                    self._station_id, self._fuel_name, distrito_id),
+                "NationalPercentile": table.percentile(
+                    self._station_id, self._fuel_name),
+            })
+        self._attr_extra_state_attributes = attributes
+
+    def _handle_coordinator_update(self) -> None:
+        """Handle a new national price table."""
+        # A failed refresh keeps the table but changes the availability
+        if self.coordinator.data is self._table and self.coordinator.last_update_success:
+            return
+        self._update_from_table()
+        self.async_write_ha_state()
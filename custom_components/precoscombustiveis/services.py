@@ -0,0 +1,113 @@
+"""Services for the PrecosCombustiveis integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import voluptuous as vol
+
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, CONF_RADIUS
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_COORDINATOR,
+    CONF_FUEL_TYPE,
+    CONF_COUNT,
+    CONF_STATIONS,
+    DEFAULT_COUNT,
+    DEFAULT_RADIUS,
+)
+from .dgeg import DGEGError
+from .helpers import async_import_module
+
+SERVICE_FIND_CHEAPEST_STATIONS = "find_cheapest_stations"
+SERVICE_GET_PRICE_HISTORY = "get_price_history"
+
+CONF_START = "start"
+CONF_END = "end"
+
+# Range of a history query without an explicit start
+DEFAULT_HISTORY_PERIOD = timedelta(days=30)
+
+FIND_CHEAPEST_STATIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_FUEL_TYPE): cv.string,
+        vol.Inclusive(CONF_LATITUDE, "coordinates"): cv.latitude,
+        vol.Inclusive(CONF_LONGITUDE, "coordinates"): cv.longitude,
+        vol.Optional(CONF_RADIUS, default=DEFAULT_RADIUS): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=100)
+        ),
+        vol.Optional(CONF_COUNT, default=DEFAULT_COUNT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=50)
+        ),
+    }
+)
+
+GET_PRICE_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_STATIONS): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+        vol.Optional(CONF_FUEL_TYPE): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_START): cv.datetime,
+        vol.Optional(CONF_END): cv.datetime,
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_find_cheapest(call: ServiceCall) -> ServiceResponse:
+        """Return the cheapest stations around a point, the home zone by default."""
+        # The search and the spatial index it needs are loaded on first use
+        search = await async_import_module(hass, "search")
+        try:
+            stations = await search.async_find_cheapest_stations(
+                hass,
+                call.data.get(CONF_LATITUDE, hass.config.latitude),
+                call.data.get(CONF_LONGITUDE, hass.config.longitude),
+                call.data[CONF_RADIUS],
+                call.data[CONF_FUEL_TYPE],
+                call.data[CONF_COUNT],
+            )
+        except DGEGError as err:
+            raise HomeAssistantError(f"Error communicating with DGEG API: {err}") from err
+        return {"stations": [station.as_dict() for station in stations]}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_STATIONS,
+        async_find_cheapest,
+        schema=FIND_CHEAPEST_STATIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_get_price_history(call: ServiceCall) -> ServiceResponse:
+        """Return the recorded prices and min/avg/max of tracked stations."""
+        coordinator = hass.data[DOMAIN].get(DATA_COORDINATOR)
+        end = dt_util.as_utc(call.data.get(CONF_END) or dt_util.utcnow())
+        start = dt_util.as_utc(call.data.get(CONF_START) or end - DEFAULT_HISTORY_PERIOD)
+        # Nothing is recorded before an entry is set up
+        history = coordinator.history.query(
+            call.data.get(CONF_STATIONS, coordinator.station_ids),
+            call.data.get(CONF_FUEL_TYPE),
+            start,
+            end,
+        ) if coordinator is not None else {}
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "stations": {
+                str(station_id): fuels for station_id, fuels in history.items()
+            },
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PRICE_HISTORY,
+        async_get_price_history,
+        schema=GET_PRICE_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
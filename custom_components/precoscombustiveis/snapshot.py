@@ -0,0 +1,101 @@
+"""Last known station data, persisted across restarts."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .dgeg import Fuel, Station
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.stations"
+
+# Coalesce the writes of consecutive refreshes
+SAVE_DELAY = 60
+
+# DataAtualizacao is stored as whole minutes since this (naive, local) epoch
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _encode_datetime(value: datetime | None) -> int | None:
+    if value is None:
+        return None
+    return int((value - _EPOCH) / timedelta(minutes=1))
+
+
+def _decode_datetime(value: int | None) -> datetime | None:
+    if value is None:
+        return None
+    return _EPOCH + timedelta(minutes=value)
+
+
+def encode_stations(stations: Dict[int, Station]) -> Dict[str, Any]:
+    """Encode stations in the compact snapshot layout.
+
+    Only the fields read by the sensors are kept. Each station is a row
+    [name, brand, type, address, latitude, longitude, fuels] and each fuel
+    a row [fuel type index, price, minutes since epoch], the fuel type names
+    being stored once in a shared table.
+    """
+    fuel_types: Dict[str, int] = {}
+    rows = {}
+    for station_id, station in stations.items():
+        rows[str(station_id)] = [
+            station.name,
+            station.brand,
+            station.type,
+            station.address,
+            station.latitude,
+            station.longitude,
+            [
+                [
+                    fuel_types.setdefault(fuel.name, len(fuel_types)),
+                    fuel.price,
+                    _encode_datetime(fuel.last_update),
+                ]
+                for fuel in station.fuels
+            ],
+        ]
+    return {"fuel_types": list(fuel_types), "stations": rows}
+
+
+def decode_stations(data: Dict[str, Any]) -> Dict[int, Station]:
+    """Rebuild the stations of a compact snapshot, skipping broken rows."""
+    fuel_types = data.get("fuel_types", [])
+    stations = {}
+    for station_id, row in data.get("stations", {}).items():
+        try:
+            name, brand, station_type, address, latitude, longitude, fuels = row
+            stations[int(station_id)] = Station.restore(
+                int(station_id), name, brand, station_type, address,
+                latitude, longitude,
+                [
+                    Fuel(fuel_types[fuel_type], price, _decode_datetime(last_update))
+                    for fuel_type, price, last_update in fuels
+                ])
+        except (IndexError, TypeError, ValueError) as err:
+            _LOGGER.debug("Ignoring snapshot of gas station %s: %s", station_id, err)
+    return stations
+
+
+class StationSnapshots:
+    """Snapshot of the last fetched data of every tracked station."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the snapshot store."""
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+
+    async def async_load(self) -> dict[int, Station]:
+        """Return the stations saved by the previous run."""
+        return decode_stations(await self._store.async_load() or {})
+
+    @callback
+    def async_save(self, stations: dict[int, Station]) -> None:
+        """Schedule saving the given stations."""
+        self._store.async_delay_save(lambda: encode_stations(stations), SAVE_DELAY)
@@ -7,7 +7,8 @@ from custom_components.precoscombustiveis.dgeg import DGEG, Station
 
 async def main():
     """Simple test function to demonstrate the DGEG API usage."""
-    async with aiohttp.ClientSession() as session:
+    # As the integration does, see client.py: DGEG certificates do not verify
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
         api = DGEG(session)
 
         print("")
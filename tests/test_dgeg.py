@@ -0,0 +1,274 @@
+"""Failure handling of the DGEG client, against a local aiohttp server.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from benchmarks.server import load_fixture
+from custom_components.precoscombustiveis import dgeg
+from custom_components.precoscombustiveis.dgeg import (
+    DGEG,
+    DGEGCircuitOpenError,
+    DGEGConnectionError,
+    DGEGResponseError,
+)
+
+STATION_ID = 65167
+
+
+class Server:
+    """GetDadosPosto answering with the handler set by each test, counting calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.handler = self.ok
+
+    async def ok(self, request: web.Request) -> web.Response:
+        return web.json_response(load_fixture("GetDadosPosto.json"))
+
+    async def _dispatch(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        return await self.handler(request)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/PrecoComb/GetDadosPosto", self._dispatch)
+        return app
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries(monkeypatch):
+    """Retry right away, and open the circuit after two failures for 0.2s."""
+    monkeypatch.setattr(dgeg, "RETRY_BACKOFF", 0)
+    monkeypatch.setattr(dgeg, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(dgeg, "CIRCUIT_RESET_TIMEOUT", 0.2)
+
+
+@pytest.fixture
+def server() -> Server:
+    return Server()
+
+
+@pytest.fixture
+def run(monkeypatch, server):
+    """Run a test coroutine with a DGEG client pointed at the local server."""
+
+    def _run(test, **kwargs):
+        async def _main():
+            test_server = TestServer(server.app())
+            await test_server.start_server()
+            monkeypatch.setattr(
+                dgeg, "API_URI_TEMPLATE",
+                str(test_server.make_url("/api/PrecoComb/GetDadosPosto?id={}")))
+            try:
+                async with aiohttp.ClientSession() as session:
+                    kwargs.setdefault("rate_limit", 1000)
+                    kwargs.setdefault("retries", 0)
+                    await test(DGEG(session, **kwargs))
+            finally:
+                await test_server.close()
+
+        asyncio.run(_main())
+
+    return _run
+
+
+def test_get_station(run, server):
+    async def test(api):
+        station = await api.get_station(STATION_ID)
+        assert station.id == STATION_ID
+        assert station.fuels
+
+    run(test)
+    assert server.calls == 1
+
+
+def test_timeout(run, server):
+    async def hang(request):
+        await asyncio.sleep(5)
+        return await server.ok(request)
+
+    server.handler = hang
+
+    async def test(api):
+        with pytest.raises(DGEGConnectionError, match="Timeout"):
+            await api.get_station(STATION_ID)
+        assert api.metrics.endpoint(dgeg.API_URI_TEMPLATE).timeouts == 1
+
+    run(test, timeout=0.1)
+
+
+def test_retry_after_server_error(run, server):
+    async def fail_once(request):
+        if server.calls == 1:
+            return web.Response(status=503)
+        return await server.ok(request)
+
+    server.handler = fail_once
+
+    async def test(api):
+        station = await api.get_station(STATION_ID)
+        assert station.id == STATION_ID
+        metrics = api.metrics.endpoint(dgeg.API_URI_TEMPLATE)
+        assert (metrics.failures, metrics.retries, metrics.successes) == (1, 1, 1)
+
+    run(test, retries=1)
+    assert server.calls == 2
+
+
+def test_retries_stop_once_the_circuit_opens(run, server):
+    async def fail(request):
+        return web.Response(status=500)
+
+    server.handler = fail
+
+    async def test(api):
+        with pytest.raises(DGEGCircuitOpenError):
+            await api.get_station(STATION_ID)
+
+    run(test, retries=5)
+    assert server.calls == 2
+
+
+def test_circuit_opens_then_admits_a_single_trial(run, server):
+    async def fail(request):
+        return web.Response(status=500)
+
+    async def slow(request):
+        await asyncio.sleep(0.05)
+        return await server.ok(request)
+
+    server.handler = fail
+
+    async def test(api):
+        for _ in range(2):
+            with pytest.raises(DGEGConnectionError, match="Status 500"):
+                await api.get_station(STATION_ID)
+        # Open: rejected without a request
+        with pytest.raises(DGEGCircuitOpenError):
+            await api.get_station(STATION_ID)
+        assert server.calls == 2
+
+        # Half-open: one concurrent caller goes through, the others are rejected
+        await asyncio.sleep(0.25)
+        server.handler = slow
+        results = await asyncio.gather(
+            *(api.get_station(STATION_ID) for _ in range(3)),
+            return_exceptions=True)
+        assert server.calls == 3
+        assert sum(isinstance(result, dgeg.Station) for result in results) == 1
+        assert sum(isinstance(result, DGEGCircuitOpenError) for result in results) == 2
+
+        # The trial succeeded: closed again
+        await asyncio.gather(*(api.get_station(STATION_ID) for _ in range(3)))
+        assert server.calls == 6
+
+    run(test)
+
+
+def test_failed_trial_opens_the_circuit_again(run, server):
+    async def fail(request):
+        return web.Response(status=500)
+
+    server.handler = fail
+
+    async def test(api):
+        for _ in range(2):
+            with pytest.raises(DGEGConnectionError):
+                await api.get_station(STATION_ID)
+        await asyncio.sleep(0.25)
+        with pytest.raises(DGEGConnectionError, match="Status 500"):
+            await api.get_station(STATION_ID)
+        assert server.calls == 3
+        # A single failed trial is enough, below the failure threshold
+        with pytest.raises(DGEGCircuitOpenError):
+            await api.get_station(STATION_ID)
+        assert server.calls == 3
+
+    run(test)
+
+
+def test_cancelled_trial_lets_another_call_try(run, server):
+    async def fail(request):
+        return web.Response(status=500)
+
+    async def hang(request):
+        await asyncio.sleep(5)
+        return await server.ok(request)
+
+    server.handler = fail
+
+    async def test(api):
+        for _ in range(2):
+            with pytest.raises(DGEGConnectionError):
+                await api.get_station(STATION_ID)
+        await asyncio.sleep(0.25)
+        server.handler = hang
+        trial = asyncio.ensure_future(api.get_station(STATION_ID))
+        await asyncio.sleep(0.05)
+        trial.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await trial
+        server.handler = server.ok
+        assert (await api.get_station(STATION_ID)).id == STATION_ID
+
+    run(test)
+
+
+def test_station_details_are_reused_then_expire(run, server, monkeypatch):
+    monkeypatch.setattr(dgeg, "STATION_CACHE_TTL", 0.1)
+
+    async def test(api):
+        await api.get_station(STATION_ID)
+        await api.get_station(STATION_ID, max_age=60)
+        assert server.calls == 1
+
+        await asyncio.sleep(0.15)
+        # Stations past the TTL are dropped as others are fetched
+        await api.get_station(STATION_ID + 1)
+        assert list(api._stations) == [STATION_ID + 1]
+        await api.get_station(STATION_ID, max_age=60)
+        assert server.calls == 3
+
+    run(test)
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        pytest.param(
+            lambda: web.Response(text="<html>maintenance</html>", content_type="application/json"),
+            id="not-json"),
+        pytest.param(
+            lambda: web.Response(text="<html>maintenance</html>", content_type="text/html"),
+            id="html"),
+        pytest.param(
+            lambda: web.json_response({"status": True, "resultado": None}),
+            id="null"),
+        pytest.param(
+            lambda: web.Response(body=json.dumps(None), content_type="application/json"),
+            id="null-body"),
+    ],
+)
+def test_invalid_payload(run, server, response):
+    async def invalid(request):
+        return response()
+
+    server.handler = invalid
+
+    async def test(api):
+        with pytest.raises(DGEGResponseError):
+            await api.get_station(STATION_ID)
+
+    run(test)
@@ -0,0 +1,141 @@
+"""Local price history: aggregates, deduplication and the stored layout."""
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.precoscombustiveis import history
+from custom_components.precoscombustiveis.dgeg import Fuel, Station
+from custom_components.precoscombustiveis.history import PriceHistory, _Series
+
+FUEL_TYPE = "Gasóleo simples"
+HOUR = 60  # minutes
+
+
+class FakeStore:
+    """Store keeping the saved data in memory."""
+
+    def __init__(self, data=None) -> None:
+        self.data = data
+        self.saves = 0
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, delay) -> None:
+        self.saves += 1
+        # Through JSON, as .storage keeps it
+        self.data = json.loads(json.dumps(data_func()))
+
+
+def price_history(data=None) -> PriceHistory:
+    prices = PriceHistory(None)
+    prices._store = FakeStore(data)
+    return prices
+
+
+def station(price: float, last_update: datetime | None, station_id: int = 1) -> Station:
+    return Station.restore(
+        station_id, "Posto", "GALP", "Outro", [], None, None,
+        [Fuel(FUEL_TYPE, price, last_update)])
+
+
+@pytest.fixture
+def series() -> _Series:
+    # 1.000 from 00:00, 1.100 from 01:00, 1.300 from 02:00
+    return _Series([0, HOUR, 2 * HOUR], [1000, 1100, 1300])
+
+
+def test_average_is_weighted_by_time_in_effect(series):
+    rows = series.query(0, 4 * HOUR)
+    assert (rows["min"], rows["avg"], rows["max"]) == (1.0, 1.175, 1.3)
+    assert rows["times"] == [0, 3600, 7200]
+    assert rows["prices"] == [1.0, 1.1, 1.3]
+
+
+def test_price_in_effect_at_start_counts(series):
+    rows = series.query(HOUR // 2, 3 * HOUR // 2)
+    assert (rows["min"], rows["avg"], rows["max"]) == (1.0, 1.05, 1.1)
+    # Only the changes inside the range are returned
+    assert rows["times"] == [3600]
+
+    rows = series.query(3 * HOUR, 4 * HOUR)
+    assert (rows["min"], rows["avg"], rows["max"]) == (1.3, 1.3, 1.3)
+    assert rows["times"] == []
+
+
+def test_range_edges(series):
+    assert series.query(-2 * HOUR, -HOUR) is None
+    # A change at the end of the range is included, for no time
+    rows = series.query(0, HOUR)
+    assert (rows["avg"], rows["max"]) == (1.0, 1.1)
+    # An empty range averages the rows it holds
+    rows = series.query(HOUR, HOUR)
+    assert (rows["min"], rows["avg"], rows["max"]) == (1.1, 1.1, 1.1)
+    assert _Series().query(0, HOUR) is None
+
+
+def test_append_skips_repeats_and_keeps_rows_sorted():
+    series = _Series()
+    assert series.append(HOUR, 1000)
+    assert not series.append(HOUR, 1000)
+    # DGEG going back in time
+    assert series.append(0, 1100)
+    assert list(series.times) == [HOUR, HOUR]
+    assert list(series.prices) == [1000, 1100]
+
+
+def test_record_only_changes():
+    prices = price_history()
+    now = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+    prices.async_record(station(1.789, datetime(2026, 10, 18, 8, 10)), now)
+    prices.async_record(station(1.789, datetime(2026, 10, 18, 8, 10)), now)
+    assert prices._store.saves == 1
+
+    # A new DataAtualizacao is a row, even at the same price
+    prices.async_record(station(1.789, datetime(2026, 10, 19, 8, 10)), now)
+    # Without a DataAtualizacao only a new price is
+    prices.async_record(station(1.789, None), now + timedelta(hours=1))
+    prices.async_record(station(1.799, None), now + timedelta(hours=2))
+    # Unpriced fuels are ignored
+    prices.async_record(station(0, datetime(2026, 10, 20, 8, 10)), now)
+    assert prices._store.saves == 3
+
+    rows = prices.query([1], None, now - timedelta(days=1), now + timedelta(days=2))
+    assert rows[1][FUEL_TYPE]["prices"] == [1.789, 1.789, 1.799]
+
+
+def test_stored_delta_encoded_and_loaded_back():
+    prices = price_history()
+    now = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+    for day, price in ((16, 1.789), (17, 1.759), (18, 1.801)):
+        prices.async_record(station(price, datetime(2026, 10, day, 8, 10)), now)
+        prices.async_record(station(price + 0.1, datetime(2026, 10, day, 8, 10), 2), now)
+
+    data = prices._store.data
+    times, values = data["stations"]["1"][FUEL_TYPE]
+    # The first row is absolute, the next ones are differences
+    assert times[1:] == [24 * HOUR, 24 * HOUR]
+    assert values == [1789, -30, 42]
+
+    loaded = price_history(data)
+    asyncio.run(loaded.async_load())
+    start, end = now - timedelta(days=7), now + timedelta(days=1)
+    assert loaded.query([1, 2], None, start, end) == prices.query([1, 2], None, start, end)
+    assert loaded.query([1], ["Gasolina simples 95"], start, end) == {}
+
+
+def test_load_drops_rows_past_the_retention(monkeypatch):
+    monkeypatch.setattr(history, "RETENTION", timedelta(days=30))
+    prices = price_history()
+    now = datetime.now(timezone.utc)
+    for days, price in ((90, 1.7), (60, 1.8), (10, 1.9)):
+        prices.async_record(station(price, None), now - timedelta(days=days))
+
+    loaded = price_history(prices._store.data)
+    asyncio.run(loaded.async_load())
+    # The last row before the cut is kept, its price is still in effect then
+    assert list(loaded._series[1][FUEL_TYPE].prices) == [1800, 1900]
@@ -0,0 +1,103 @@
+"""National price table: aggregates, percentiles and municipio ranks."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.precoscombustiveis.national import (
+    PriceTable,
+    build_distrito_prices,
+)
+
+DIESEL = "Gasóleo simples"
+PETROL = "Gasolina simples 95"
+UPDATED = "2026-10-18 08:10"
+
+
+def listed(station_id: int, municipio: str, **prices: float) -> dict:
+    fuels = {"diesel": DIESEL, "petrol": PETROL}
+    return {
+        "Id": station_id,
+        "Municipio": municipio,
+        "Combustiveis": {fuels[key]: [price, UPDATED] for key, price in prices.items()},
+    }
+
+
+@pytest.fixture
+def table() -> PriceTable:
+    return PriceTable({
+        3: build_distrito_prices([
+            listed(301, "Braga", diesel=1.759, petrol=1.899),
+            listed(302, "Braga", diesel=1.799),
+            listed(303, "Braga", diesel=1.779),
+            listed(304, "Braga", diesel=1.819),
+            listed(305, "Guimarães", diesel=1.739),
+            # Not priced, left out
+            {"Id": 306, "Municipio": "Braga", "Combustiveis": {}},
+        ]),
+        13: build_distrito_prices([
+            listed(1301, "Porto", diesel=1.749, petrol=1.879),
+            listed(1302, "Porto", diesel=1.769),
+        ]),
+    })
+
+
+def test_aggregates_per_district_and_national(table):
+    braga = table.aggregate(DIESEL, 3)
+    assert (braga["count"], braga["min"], braga["avg"], braga["max"]) == (5, 1.739, 1.779, 1.819)
+    distrito, row = braga["cheapest"]
+    assert (distrito, table.distritos[3].station_ids[row]) == (3, 305)
+
+    national = table.aggregate(DIESEL)
+    assert (national["count"], national["min"], national["max"]) == (7, 1.739, 1.819)
+    assert national["avg"] == 1.773
+    distrito, row = table.aggregate(PETROL)["cheapest"]
+    assert (distrito, table.distritos[13].station_ids[row]) == (13, 1301)
+    assert table.aggregate("GPL Auto") is None
+    assert table.aggregate(DIESEL, 1) is None
+    assert len(table) == 9
+
+
+def test_percentile(table):
+    # Share of the other stations cheaper
+    assert table.percentile(305, DIESEL, 3) == 0.0
+    assert table.percentile(304, DIESEL, 3) == 100.0
+    assert table.percentile(303, DIESEL, 3) == 50.0
+    assert table.percentile(303, DIESEL) == 66.7
+    assert table.percentile(1302, DIESEL) == 50.0
+    assert table.percentile(302, PETROL) is None
+
+
+def test_municipio_rank_even_count(table):
+    # Braga: 1.759, 1.779, 1.799, 1.819
+    rank = table.municipios.rank(303, DIESEL, 1.779)
+    assert rank == {
+        "municipio": "Braga",
+        "rank": 2,
+        "count": 4,
+        "percentile": 33.3,
+        "median_delta": -0.01,
+    }
+
+
+def test_municipio_rank_odd_count_and_single_station(table):
+    # Porto: 1.749 and 1.769, Guimarães a single station
+    assert table.municipios.rank(1301, DIESEL, 1.749)["median_delta"] == -0.01
+    rank = table.municipios.rank(305, DIESEL, 1.739)
+    assert (rank["rank"], rank["count"], rank["percentile"], rank["median_delta"]) == (1, 1, 0.0, 0.0)
+
+    table = PriceTable({3: build_distrito_prices([
+        listed(301, "Braga", diesel=1.759),
+        listed(302, "Braga", diesel=1.799),
+        listed(303, "Braga", diesel=1.779),
+    ])})
+    rank = table.municipios.rank(302, DIESEL, 1.799)
+    assert (rank["rank"], rank["percentile"], rank["median_delta"]) == (3, 100.0, 0.02)
+    # The price of the sensor, more recent than the listing, ranks among the others
+    rank = table.municipios.rank(302, DIESEL, 1.749)
+    assert (rank["rank"], rank["percentile"]) == (1, 0.0)
+
+
+def test_municipio_rank_unknown(table):
+    assert table.municipios.rank(999, DIESEL, 1.7) is None
+    assert table.municipios.rank(305, PETROL, 1.9) is None
+    assert table.municipios.rank(301, DIESEL, 0) is None
@@ -0,0 +1,62 @@
+"""Incremental index of the cheapest prices."""
+from __future__ import annotations
+
+from custom_components.precoscombustiveis.dgeg import Fuel, Station
+from custom_components.precoscombustiveis.price_index import PriceIndex
+
+DIESEL = "Gasóleo simples"
+PETROL = "Gasolina simples 95"
+
+
+def station(station_id: int, **prices: float) -> Station:
+    fuels = {"diesel": DIESEL, "petrol": PETROL}
+    return Station.restore(
+        station_id, f"Posto {station_id}", "GALP", "Outro", [], None, None,
+        [Fuel(fuels[key], price, None) for key, price in prices.items()])
+
+
+def test_cheapest_among_all_and_a_subset():
+    index = PriceIndex()
+    index.update(station(1, diesel=1.799, petrol=1.899))
+    index.update(station(2, diesel=1.759))
+    index.update(station(3, diesel=1.779, petrol=1.859))
+
+    assert index.cheapest(DIESEL) == (1.759, 2)
+    assert index.cheapest(PETROL) == (1.859, 3)
+    assert index.cheapest(DIESEL, [1, 3]) == (1.779, 3)
+    assert index.cheapest(PETROL, [2]) is None
+    assert index.cheapest("GPL Auto") is None
+
+
+def test_equal_prices_rank_by_station_id():
+    index = PriceIndex()
+    index.update(station(7, diesel=1.759))
+    index.update(station(4, diesel=1.759))
+    assert index.cheapest(DIESEL) == (1.759, 4)
+
+
+def test_price_changes_move_the_station():
+    index = PriceIndex()
+    index.update(station(1, diesel=1.799))
+    index.update(station(2, diesel=1.759))
+    index.update(station(2, diesel=1.819))
+    assert index.cheapest(DIESEL) == (1.799, 1)
+    assert index._sorted[DIESEL] == [(1.799, 1), (1.819, 2)]
+
+
+def test_fuels_no_longer_sold_or_unpriced_are_dropped():
+    index = PriceIndex()
+    index.update(station(1, diesel=1.799, petrol=1.899))
+    index.update(station(1, diesel=1.799, petrol=0))
+    assert index.cheapest(PETROL) is None
+    assert index.cheapest(DIESEL) == (1.799, 1)
+
+
+def test_remove_drops_every_price_of_a_station():
+    index = PriceIndex()
+    index.update(station(1, diesel=1.799, petrol=1.899))
+    index.update(station(2, diesel=1.819))
+    index.remove(1)
+    index.remove(5)
+    assert index.cheapest(DIESEL) == (1.819, 2)
+    assert index.cheapest(PETROL) is None
@@ -0,0 +1,83 @@
+"""Adaptive polling schedule: backoff, posting windows and bounds."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from custom_components.precoscombustiveis.dgeg import Fuel, Station
+from custom_components.precoscombustiveis.scheduler import AdaptiveSchedule
+
+MINUTE = timedelta(minutes=1)
+FUEL_TYPE = "Gasóleo simples"
+
+
+def station(last_update: datetime) -> Station:
+    # January dates: Lisbon local time is UTC
+    return Station.restore(
+        1, "Posto", "GALP", "Outro", [], None, None,
+        [Fuel(FUEL_TYPE, 1.789, last_update)])
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def poll(schedule: AdaptiveSchedule, last_update: datetime) -> timedelta:
+    """Poll when due, return the interval to the next poll."""
+    now = schedule.next_poll
+    schedule.record(station(last_update), now)
+    return schedule.next_poll - now
+
+
+def test_backs_off_exponentially_up_to_the_maximum():
+    schedule = AdaptiveSchedule(15 * MINUTE, 120 * MINUTE)
+    schedule.next_poll = utc(2026, 1, 5, 12)
+    # The first fetch only seeds the history, nothing changed
+    intervals = [poll(schedule, datetime(2026, 1, 5, 8, 10)) for _ in range(5)]
+    assert intervals == [30 * MINUTE, 60 * MINUTE, 120 * MINUTE, 120 * MINUTE, 120 * MINUTE]
+
+
+def test_change_resets_the_backoff():
+    schedule = AdaptiveSchedule(15 * MINUTE, 360 * MINUTE)
+    schedule.next_poll = utc(2026, 1, 5, 12)
+    for _ in range(3):
+        poll(schedule, datetime(2026, 1, 5, 8, 10))
+    assert poll(schedule, datetime(2026, 1, 5, 13, 40)) == 15 * MINUTE
+    assert poll(schedule, datetime(2026, 1, 5, 13, 40)) == 30 * MINUTE
+
+
+def test_wakes_up_for_the_posting_window():
+    schedule = AdaptiveSchedule(15 * MINUTE, 360 * MINUTE)
+    schedule.record(station(datetime(2026, 1, 5, 8, 10)), utc(2026, 1, 5, 12))
+    # A second change posted at 08:xx makes 08:00-09:00 a posting window
+    schedule.record(station(datetime(2026, 1, 6, 8, 10)), utc(2026, 1, 6, 12))
+    assert schedule.next_poll == utc(2026, 1, 6, 12, 15)
+
+    polls = []
+    while schedule.next_poll < utc(2026, 1, 7, 8, 30):
+        poll(schedule, datetime(2026, 1, 6, 8, 10))
+        polls.append(schedule.next_poll)
+    # Backs off overnight, but never past the start of the window
+    assert polls[-5:] == [
+        utc(2026, 1, 7, 1, 45),
+        utc(2026, 1, 7, 7, 45),
+        utc(2026, 1, 7, 8),
+        utc(2026, 1, 7, 8, 15),
+        utc(2026, 1, 7, 8, 30),
+    ]
+
+
+def test_set_bounds_brings_the_next_poll_within_them():
+    schedule = AdaptiveSchedule(15 * MINUTE, 360 * MINUTE)
+    now = utc(2026, 1, 5, 12)
+    schedule.next_poll = now
+    for _ in range(5):
+        poll(schedule, datetime(2026, 1, 5, 8, 10))
+    now = schedule.next_poll - 300 * MINUTE
+
+    schedule.set_bounds(60 * MINUTE, 90 * MINUTE, now)
+    assert schedule.next_poll == now + 90 * MINUTE
+    assert poll(schedule, datetime(2026, 1, 5, 8, 10)) == 90 * MINUTE
+
+    # The maximum never goes below the minimum
+    schedule.set_bounds(120 * MINUTE, 60 * MINUTE, now)
+    assert schedule.max_interval == 120 * MINUTE
@@ -0,0 +1,55 @@
+"""Compact station snapshots."""
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+from custom_components.precoscombustiveis.dgeg import Fuel, Station
+from custom_components.precoscombustiveis.snapshot import decode_stations, encode_stations
+
+
+def station(station_id: int, *fuels: Fuel) -> Station:
+    return Station.restore(
+        station_id, f"Posto {station_id}", "GALP", "Outro",
+        ["Rua", "Braga", "4700-000"], 41.55, -8.42, fuels)
+
+
+def as_tuple(station: Station) -> tuple:
+    return (
+        station.id, station.name, station.brand, station.type, station.address,
+        station.latitude, station.longitude,
+        [(fuel.name, fuel.price, fuel.last_update) for fuel in station.fuels],
+    )
+
+
+def test_round_trip():
+    stations = {
+        1: station(
+            1,
+            Fuel("Gasóleo simples", 1.789, datetime(2026, 10, 18, 8, 10)),
+            Fuel("Gasolina simples 95", 1.889, None)),
+        2: station(2, Fuel("Gasóleo simples", 1.759, datetime(2026, 10, 17, 23, 59))),
+    }
+    # Through JSON, as .storage keeps it
+    data = json.loads(json.dumps(encode_stations(stations)))
+    decoded = decode_stations(data)
+    assert {key: as_tuple(value) for key, value in decoded.items()} == {
+        key: as_tuple(value) for key, value in stations.items()}
+
+
+def test_fuel_types_are_stored_once():
+    stations = {
+        station_id: station(station_id, Fuel("Gasóleo simples", 1.789, None))
+        for station_id in range(3)
+    }
+    data = encode_stations(stations)
+    assert data["fuel_types"] == ["Gasóleo simples"]
+    assert all(row[6][0][0] == 0 for row in data["stations"].values())
+
+
+def test_broken_rows_are_skipped():
+    data = encode_stations({1: station(1, Fuel("Gasóleo simples", 1.789, None))})
+    data["stations"]["2"] = ["Posto 2", "GALP"]
+    data["stations"]["3"] = [*data["stations"]["1"][:6], [[5, 1.7, None]]]
+    assert list(decode_stations(data)) == [1]
+    assert decode_stations({}) == {}